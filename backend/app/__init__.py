@@ -12,6 +12,9 @@ load_dotenv()
 
 # --- Core App Imports ---
 from . import config
+from . import security_headers
+from .json_provider import OrjsonProvider, ORJSON_AVAILABLE
+from . import pg_pool
 
 # --- Service Layer Imports ---
 # --- Service Layer Imports ---
@@ -35,6 +38,14 @@ cors = CORS()
 # --- Service Instantiation ---
 logger = logging.getLogger(__name__)
 
+# Try to import WhiteNoise; gracefully fallback to the /static route if not installed
+try:
+    from whitenoise import WhiteNoise
+    WHITENOISE_AVAILABLE = True
+except ImportError:
+    WHITENOISE_AVAILABLE = False
+    logger.warning("whitenoise not installed. Static files are served by Flask. Install: pip install whitenoise")
+
 try:
     # Initialize Supabase client with SERVICE ROLE KEY (bypasses RLS)
     # This is required for backend operations that need to write to the database
@@ -74,6 +85,21 @@ def create_app():
     
     # === Load Config ===
     app.config.from_object(config)
+
+    # === JSON Serialization (orjson) ===
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+
+    # === Static Files (WhiteNoise) ===
+    # Answers /static/* before Flask routing, so asset hits never reach a view or an after_request hook
+    if WHITENOISE_AVAILABLE:
+        app.wsgi_app = WhiteNoise(
+            app.wsgi_app,
+            root=app.static_folder,
+            prefix='/static/',
+            max_age=config.CACHE_MAX_AGE,
+            autorefresh=app.debug
+        )
     
     # Set secret key for sessions
     app.secret_key = app.config.get('FLASK_SECRET_KEY', os.urandom(32).hex())
@@ -86,6 +112,7 @@ def create_app():
         methods=["GET", "POST", "OPTIONS"],
         allow_headers=["Authorization", "Content-Type"]
     )
+    security_headers.init_rate_limiting(app)
 
     # === Register Blueprints (Web Routes) ===
     app.register_blueprint(errors.bp)
@@ -108,10 +135,15 @@ def create_app():
     
     # === Inject Services onto the App Object ===
     app.chat_service = chat_service
+    app.emotion_service = analysis_service
     app.supabase = supabase  # Changed from app.memory_repo to app.supabase
+    # Pooled Postgres for hot reads; None falls back to PostgREST
+    app.pg = pg_pool.create_pool(config.DATABASE_URL, config.PG_POOL_MIN_SIZE, config.PG_POOL_MAX_SIZE)
 
     # === Background Tasks ===
     schedule_proactive_checkins(app, chat_service)
+    main.start_chat_turn_recorder()
+    chat_service.start_mood_recorder()
 
     return app
 
@@ -19,6 +19,15 @@ SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
 
+# JWT verification - Supabase publishes its signing keys here; the key set is cached in-process
+SUPABASE_JWKS_URL = os.getenv('SUPABASE_JWKS_URL', f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None)
+JWKS_CACHE_TTL = int(os.getenv('JWKS_CACHE_TTL', '3600'))  # Refresh signing keys hourly
+
+# Direct Postgres for hot reads - use the Supavisor transaction-mode URL (port 6543); unset keeps PostgREST
+DATABASE_URL = os.getenv('DATABASE_URL')
+PG_POOL_MIN_SIZE = int(os.getenv('PG_POOL_MIN_SIZE', '5'))
+PG_POOL_MAX_SIZE = int(os.getenv('PG_POOL_MAX_SIZE', '20'))
+
 # Log configuration status (without exposing keys)
 import logging
 _config_logger = logging.getLogger(__name__)
@@ -32,6 +41,10 @@ CHAT_HISTORY_LENGTH = int(os.getenv('CHAT_HISTORY_LENGTH', '10'))
 MAX_HISTORY_TOKENS = int(os.getenv('MAX_HISTORY_TOKENS', '1200'))
 SLOW_RESPONSE_THRESHOLD = float(os.getenv('SLOW_RESPONSE_THRESHOLD', '5.0'))
 AUTO_MEMORIZE_COOLDOWN = int(os.getenv('AUTO_MEMORIZE_COOLDOWN', '10'))
+ASYNC_CHAT_WRITES = os.getenv('ASYNC_CHAT_WRITES', 'true').lower() == 'true'  # Set false to store chat turns before /chat responds
+BULK_RECORDER_SIZE = int(os.getenv('BULK_RECORDER_SIZE', '50'))  # Max chat turns stored per add_message_pairs call
+BULK_RECORDER_FLUSH_TIMEOUT_MS = int(os.getenv('BULK_RECORDER_FLUSH_TIMEOUT_MS', '100'))  # Max wait to fill a batch
+BULK_RECORDER_QUEUE_SIZE = int(os.getenv('BULK_RECORDER_QUEUE_SIZE', '10000'))  # When full, /chat stores its turn inline
 
 # User Configuration
 DEFAULT_USER_ID = os.getenv('DEFAULT_USER_ID', 'b62ed4f8-6b5c-4095-9096-dfef6c968182')
@@ -41,8 +54,13 @@ DEFAULT_USER_ID = os.getenv('DEFAULT_USER_ID', 'b62ed4f8-6b5c-4095-9096-dfef6c96
 ENABLE_AUTH = os.getenv('ENABLE_AUTH', 'false').lower() == 'true'
 FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY')
 ALLOWED_ORIGINS = os.getenv('ALLOWED_ORIGINS', 'http://localhost:8081,http://localhost:3000,http://127.0.0.1:8081,https://warmth-ai.onrender.com')
+RATE_LIMIT_STORAGE_URI = os.getenv('RATE_LIMIT_STORAGE_URI', os.getenv('REDIS_URL', 'memory://'))  # Shared across workers when Redis is configured
 
 # Performance Configuration
 CACHE_MAX_AGE = int(os.getenv('CACHE_MAX_AGE', '31536000'))
+# Per-user read endpoints (recap, memory graph, chat history) - lets clients skip refetches on tab focus
+PRIVATE_CACHE_CONTROL = os.getenv('PRIVATE_CACHE_CONTROL', 'private, max-age=30, stale-while-revalidate=60')
 HEAVY_TASK_WORKERS = int(os.getenv('HEAVY_TASK_WORKERS', '4'))
+KDF_WORKERS = int(os.getenv('KDF_WORKERS', '2'))  # Processes per app worker for export password key derivation
+MEMORY_EXTRACTION_WORKERS = int(os.getenv('MEMORY_EXTRACTION_WORKERS', '2'))  # Threads per app worker for quiet-period memory extraction
 LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', '3600'))  # LLM response cache (1 hour)
\ No newline at end of file
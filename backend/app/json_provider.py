@@ -0,0 +1,54 @@
+"""
+JSON provider backed by orjson.
+Used for every jsonify() response and request.get_json() call in the app.
+"""
+import json
+import logging
+import decimal
+from flask.json.provider import JSONProvider
+
+logger = logging.getLogger(__name__)
+
+# Try to import orjson; gracefully fallback to Flask's default provider if not installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson not installed. Using Flask's default JSON provider. Install: pip install orjson")
+
+
+def _default(obj):
+    """Serializes types orjson does not handle natively."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj) -> bytes:
+    """Serializes to UTF-8 JSON bytes with orjson when installed, otherwise the stdlib json module."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default).encode()
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider that serializes with orjson instead of the stdlib json module."""
+
+    option = orjson.OPT_NON_STR_KEYS if ORJSON_AVAILABLE else 0
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def dumps_bytes(self, obj, **kwargs) -> bytes:
+        """Serializes to UTF-8 bytes, skipping the str round-trip."""
+        return orjson.dumps(obj, default=kwargs.get('default', _default), option=self.option)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype="application/json")
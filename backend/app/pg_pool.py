@@ -0,0 +1,60 @@
+"""
+Direct Postgres connection pool for hot read paths.
+Points at Supavisor's transaction-mode port (6543) via DATABASE_URL; when that is unset
+(or psycopg is not installed) routes keep reading through PostgREST with supabase-py.
+"""
+import logging
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Try to import psycopg; gracefully fallback to PostgREST if not installed
+try:
+    from psycopg_pool import ConnectionPool
+    PG_POOL_AVAILABLE = True
+except ImportError:
+    ConnectionPool = None
+    PG_POOL_AVAILABLE = False
+    logger.warning("psycopg_pool not installed. Reads go through PostgREST. Install: pip install 'psycopg[binary]' psycopg-pool")
+
+
+def create_pool(conninfo: Optional[str], min_size: int, max_size: int) -> Optional["ConnectionPool"]:
+    """
+    Opens the shared connection pool, or returns None when direct SQL is not configured.
+
+    Args:
+        conninfo: Postgres connection string (Supavisor transaction pooler)
+        min_size: Connections kept open per app worker
+        max_size: Upper bound on connections per app worker
+
+    Returns:
+        ConnectionPool or None
+    """
+    if not conninfo:
+        return None
+    if not PG_POOL_AVAILABLE:
+        logger.warning("DATABASE_URL is set but psycopg_pool is not installed; using PostgREST")
+        return None
+
+    return ConnectionPool(
+        conninfo,
+        min_size=min_size,
+        max_size=max_size,
+        # Transaction-mode poolers hand each statement a different backend, so server-side
+        # prepared statements cannot be reused; every query here is a single read anyway
+        kwargs={'autocommit': True, 'prepare_threshold': None},
+        name="warmth-pg",
+        open=True,
+    )
+
+
+def fetch_json(pool: "ConnectionPool", sql: str, params: tuple) -> Any:
+    """
+    Runs a query that returns a single json/jsonb value and returns it decoded.
+
+    Building the JSON in Postgres keeps row shapes identical to PostgREST responses
+    (timestamps and UUIDs arrive as strings), so callers can switch paths transparently.
+    """
+    with pool.connection() as conn:
+        row = conn.execute(sql, params).fetchone()
+    return row[0] if row else None
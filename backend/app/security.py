@@ -7,18 +7,68 @@ import hashlib
 import secrets
 import base64
 import logging
+import multiprocessing
 from functools import wraps
+from concurrent.futures import ProcessPoolExecutor
 from flask import session, request, jsonify, abort
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import jwt
 from supabase import Client
 
+from .config import SUPABASE_JWKS_URL, JWKS_CACHE_TTL, KDF_WORKERS
+
 logger = logging.getLogger(__name__)
 
+# Auth and CSRF settings are fixed for the life of the process, so resolve them once at import
+_CSRF_ENABLED = os.getenv('ENABLE_CSRF', 'false').lower() == 'true'
+_AUTH_ENABLED = os.getenv('ENABLE_AUTH', 'true').lower() == 'true'
+_DEV_USER_ID = os.getenv('DEFAULT_USER_ID', 'a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11')
+
 # === JWT Authentication with Supabase ===
 
+# Signing keys are fetched once and cached by kid; the key set is refreshed every JWKS_CACHE_TTL seconds
+_jwks_client = None
+_JWKS_ALGORITHMS = ('RS256', 'ES256')
+
+def _get_jwks_client():
+    """Returns the shared JWKS client, creating it on first use."""
+    global _jwks_client
+    if _jwks_client is None and SUPABASE_JWKS_URL:
+        _jwks_client = jwt.PyJWKClient(SUPABASE_JWKS_URL, cache_jwk_set=True, lifespan=JWKS_CACHE_TTL)
+    return _jwks_client
+
+def verify_jwt_locally(token: str) -> dict:
+    """
+    Verifies a Supabase JWT signature against the cached JWKS, without calling Supabase.
+
+    Returns:
+        dict: User information built from the token claims
+
+    Raises:
+        jwt.ExpiredSignatureError: If the token has expired
+        jwt.PyJWKClientError: If the signing key cannot be fetched or matched
+        jwt.InvalidTokenError: If the token is otherwise invalid (including HS256-signed tokens)
+    """
+    jwks_client = _get_jwks_client()
+    if jwks_client is None:
+        raise jwt.PyJWKClientError("SUPABASE_JWKS_URL not configured")
+
+    # Legacy projects sign with a shared HS256 secret that is never published in the JWKS
+    algorithm = jwt.get_unverified_header(token).get('alg')
+    if algorithm not in _JWKS_ALGORITHMS:
+        raise jwt.InvalidAlgorithmError(f"Algorithm {algorithm} is not verifiable via JWKS")
+
+    signing_key = jwks_client.get_signing_key_from_jwt(token)
+    claims = jwt.decode(token, signing_key.key, algorithms=list(_JWKS_ALGORITHMS), audience='authenticated')
+    return {
+        'id': claims['sub'],
+        'email': claims.get('email'),
+        'aud': claims.get('aud'),
+        'role': claims.get('role'),
+        'user_metadata': claims.get('user_metadata', {}),
+        'confirmed_at': None
+    }
+
 def validate_supabase_jwt(token: str, supabase: Client) -> dict:
     """
     Validates a Supabase JWT token and extracts user information.
@@ -31,22 +81,31 @@ def validate_supabase_jwt(token: str, supabase: Client) -> dict:
         dict: User information if valid, None if invalid
     """
     try:
-        # 1. Try Supabase client validation first
+        # 1. Verify locally against the cached JWKS (no network round-trip)
+        try:
+            return verify_jwt_locally(token)
+        except jwt.ExpiredSignatureError:
+            return None
+        except (jwt.PyJWKClientError, jwt.InvalidTokenError) as local_error:
+            # Unknown key or symmetric (HS256) project secret - let Supabase decide
+            logger.debug(f"Local JWT verification unavailable: {local_error}")
+
+        # 2. Fall back to Supabase client validation
         try:
-            user = supabase.auth.get_user(token)
-            if user and hasattr(user, 'user'):
+            user = getattr(supabase.auth.get_user(token), 'user', None)
+            if user:
                 return {
-                    'id': user.user.id,
-                    'email': user.user.email,
-                    'aud': user.user.aud,
-                    'role': user.user.role,
-                    'confirmed_at': str(user.user.confirmed_at) if user.user.confirmed_at else None
+                    'id': user.id,
+                    'email': user.email,
+                    'aud': user.aud,
+                    'role': user.role,
+                    'confirmed_at': str(user.confirmed_at) if user.confirmed_at else None
                 }
         except Exception as supabase_error:
             # Supabase validation failed, check if it's a mock token
             pass
 
-        # 2. Fallback: Check if it's a valid Mock Dev Token
+        # 3. Fallback: Check if it's a valid Mock Dev Token
         # (Only if Supabase validation failed)
         # DISABLED BY USER REQUEST
         # try:
@@ -81,37 +140,53 @@ def extract_auth_token() -> str:
     Returns:
         str: JWT token if found, None otherwise
     """
-    auth_header = request.headers.get('Authorization')
-    if auth_header and auth_header.startswith('Bearer '):
-        return auth_header[7:]  # Remove 'Bearer ' prefix
+    auth_header = request.headers.get('Authorization', '')
+    token = auth_header.removeprefix('Bearer ')
+    # removeprefix returns the header unchanged when the scheme is missing
+    if token and token != auth_header:
+        return token
     return None
 
 # === Encryption for Exported Data (Keep these) ===
 
+# PBKDF2 at 100k iterations is pure CPU; run it in worker processes so the request worker keeps serving I/O
+_kdf_pool = None
+_KDF_SALT = b'warmth_export_salt'  # In production, use random salt per export
+_KDF_ITERATIONS = 100000
+
+def _get_kdf_pool() -> ProcessPoolExecutor:
+    """Returns the shared key-derivation pool, creating it on first use."""
+    global _kdf_pool
+    if _kdf_pool is None:
+        # Spawned, not forked: a gevent worker is monkey-patched and running recorder/scheduler threads,
+        # and a fork would copy their held locks and the hub into the child
+        _kdf_pool = ProcessPoolExecutor(max_workers=KDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _kdf_pool
+
+def _derive_key(password: str) -> bytes:
+    """Derives a Fernet key from a password with PBKDF2-HMAC-SHA256 in the KDF pool."""
+    # The stdlib function pickles by reference to _hashlib, so spawned children never import (and initialize) the app package
+    raw_key = _get_kdf_pool().submit(hashlib.pbkdf2_hmac, 'sha256', password.encode(), _KDF_SALT, _KDF_ITERATIONS, 32).result()
+    return base64.urlsafe_b64encode(raw_key)
+
 def generate_encryption_key(password: str = None) -> bytes:
     """Generates an encryption key from a password or creates a new one."""
     if password:
         # Derive key from password
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b'warmth_export_salt',  # In production, use random salt per export
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
+        key = _derive_key(password)
     else:
         # Generate random key
         key = Fernet.generate_key()
     return key
 
-def encrypt_data(data: str, password: str = None) -> str:
+def encrypt_data(data, password: str = None) -> str:
     """
-    Encrypts data using Fernet symmetric encryption.
+    Encrypts data (str or already-encoded bytes) using Fernet symmetric encryption.
     If password is provided, derives key from it. Otherwise uses random key.
     """
     key = generate_encryption_key(password)
     fernet = Fernet(key)
-    encrypted = fernet.encrypt(data.encode())
+    encrypted = fernet.encrypt(data if isinstance(data, bytes) else data.encode())
     return base64.urlsafe_b64encode(encrypted).decode()
 
 def decrypt_data(encrypted_data: str, password: str = None, key: bytes = None) -> str:
@@ -188,9 +263,7 @@ def csrf_protect(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        enable_csrf = os.getenv('ENABLE_CSRF', 'false').lower() == 'true'
-
-        if not enable_csrf:
+        if not _CSRF_ENABLED:
             # CSRF protection disabled (localhost only)
             return f(*args, **kwargs)
 
@@ -216,12 +289,10 @@ def require_auth(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # For development, allow skipping auth
-        enable_auth = os.getenv('ENABLE_AUTH', 'true').lower() == 'true'
-
-        if not enable_auth:
+        if not _AUTH_ENABLED:
             # Authentication disabled for development
             request.current_user = {
-                'id': os.getenv('DEFAULT_USER_ID', 'a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11'),
+                'id': _DEV_USER_ID,
                 'email': 'dev@local.dev'
             }
             return f(*args, **kwargs)
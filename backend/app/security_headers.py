@@ -7,6 +7,8 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from functools import wraps
 
+from .config import RATE_LIMIT_STORAGE_URI
+
 
 def init_security_headers(app: Flask):
     """Initialize security headers for the Flask application"""
@@ -55,14 +57,25 @@ def init_security_headers(app: Flask):
 
 
 # Initialize rate limiter
+# Limits are declared per route; counters live in Redis when configured so every worker
+# shares them, and fall back to process memory if Redis becomes unreachable
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    in_memory_fallback_enabled=True,
     headers_enabled=True
 )
 
 
+def auth_rate_limit_key():
+    """Rate limit key for credential endpoints: the submitted email, else the client IP"""
+    data = request.get_json(silent=True, cache=True)
+    email = data.get('email') if isinstance(data, dict) else None
+    if isinstance(email, str) and email.strip():
+        return f"email:{email.strip().lower()}"
+    return get_remote_address()
+
+
 def init_rate_limiting(app: Flask):
     """Initialize rate limiting for the Flask application"""
     limiter.init_app(app)
@@ -118,6 +131,6 @@ def is_production():
     return os.getenv('FLASK_ENV') != 'development'
 
 
-def dev_bypass_rate_limit(limit: str):
+def dev_bypass_rate_limit(limit: str, key_func=None):
     """Rate limit decorator that bypasses limits in development"""
-    return conditional_rate_limit(limit, lambda: is_production())
\ No newline at end of file
+    return limiter.limit(limit, key_func=key_func, exempt_when=lambda: not is_production())
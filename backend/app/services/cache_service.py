@@ -6,8 +6,11 @@ Caches embeddings, mood contexts, and search results.
 
 import logging
 import json
+import hashlib
 import time
-from typing import Optional, Any, List, Dict
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Any, List, Dict, Tuple
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
@@ -31,6 +34,7 @@ class CacheManager:
     TTL_EMBEDDING = 24 * 60 * 60      # 24 hours for embeddings (immutable)
     TTL_MOOD_CONTEXT = 5 * 60          # 5 minutes for mood context (changes frequently)
     TTL_SEARCH_RESULT = 10 * 60        # 10 minutes for search results (user-specific)
+    TTL_FALLBACK = 24 * 60 * 60        # 24 hours for last-known-good copies served during outages
     TTL_MEMORY_IMPORTANCE = 60 * 60    # 1 hour for importance scores
     
     def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379, 
@@ -194,6 +198,33 @@ class CacheManager:
         
         return True
     
+    def get_or_load(self, prefix: str, key: str, load, ttl: int) -> Tuple[Any, bool]:
+        """
+        Return (value, stale) for key, calling `load()` on a miss.
+        
+        Each successful load also refreshes a last-known-good copy kept for TTL_FALLBACK.
+        If `load()` raises, that copy is returned with stale=True; with no copy the error propagates.
+        """
+        value = self.get(prefix, key)
+        if value is not None:
+            return value, False
+        try:
+            value = load()
+        except Exception as e:
+            fallback = self.get(f"{prefix}_fallback", key)
+            if fallback is None:
+                raise
+            logger.warning(f"Serving stale {prefix}:{key} after load failed: {e}")
+            return fallback, True
+        self.set(prefix, key, value, ttl=ttl)
+        self.set(f"{prefix}_fallback", key, value, ttl=self.TTL_FALLBACK)
+        return value, False
+    
+    def delete_with_fallback(self, prefix: str, key: str) -> bool:
+        """Delete a get_or_load entry together with its last-known-good copy."""
+        self.delete(f"{prefix}_fallback", key)
+        return self.delete(prefix, key)
+    
     def clear_prefix(self, prefix: str) -> int:
         """
         Clear all cache entries with given prefix.
@@ -378,7 +409,9 @@ class SearchResultCache:
     
     def _make_key(self, user_id: str, query: str, top_k: int) -> str:
         """Generate cache key for search."""
-        return f"user_{user_id}_q_{hash(query)}_k_{top_k}"
+        # hash() is salted per process, so it cannot key entries shared through Redis
+        query_hash = hashlib.blake2b(query.encode(), digest_size=16).hexdigest()
+        return f"user_{user_id}_q_{query_hash}_k_{top_k}"
     
     def get_search_results(self, user_id: str, query: str, top_k: int) -> Optional[List[Dict]]:
         """
@@ -421,3 +454,134 @@ class SearchResultCache:
         """Invalidate all search results for user when memory changes."""
         # In production, might want more granular invalidation
         return self.cache.clear_prefix("search_result")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one.
+    The first caller runs the function; callers arriving while it runs wait for
+    and share its result (or exception) instead of repeating the work.
+    """
+    
+    def __init__(self, timeout: float = 30):
+        """
+        Initialize single-flight group.
+        
+        Args:
+            timeout: Seconds a waiting caller blocks before giving up
+        """
+        self.timeout = timeout
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: str, fn) -> Any:
+        """
+        Run `fn()` for key unless a call for key is already in flight, then share its outcome.
+        
+        Args:
+            key: Deduplication key (usually the user ID)
+            fn: Zero-argument callable
+            
+        Returns:
+            The result of the single in-flight call
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not leader:
+            return future.result(timeout=self.timeout)
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+class StaleWhileRevalidateCache:
+    """
+    Cache that answers from stale data while refreshing it in the background.
+    Entries are fresh for `ttl` seconds; for a further `stale_window` seconds they are
+    still served but trigger one background refresh; after that they are recomputed inline.
+    """
+    
+    _refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="swr-refresh")
+    
+    def __init__(self, cache_manager: CacheManager, prefix: str, ttl: int, stale_window: int):
+        """
+        Initialize stale-while-revalidate cache.
+        
+        Args:
+            cache_manager: CacheManager instance
+            prefix: Cache namespace
+            ttl: Seconds an entry is served without refreshing
+            stale_window: Extra seconds a stale entry may be served while refreshing
+        """
+        self.cache = cache_manager
+        self.prefix = prefix
+        self.ttl = ttl
+        self.stale_window = stale_window
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._inflight = SingleFlight()
+    
+    def get_or_compute(self, key: str, compute) -> Any:
+        """
+        Return the cached value for key, computing it with `compute()` when absent.
+        
+        Args:
+            key: Unique key within namespace (usually the user ID)
+            compute: Zero-argument callable producing a JSON-serializable value
+            
+        Returns:
+            Cached or freshly computed value
+        """
+        entry = self.cache.get(self.prefix, key)
+        if entry is not None:
+            if time.time() - entry['cached_at'] >= self.ttl:
+                self._refresh_in_background(key, compute)
+            return entry['value']
+        # Concurrent misses for the same key share one computation
+        return self._inflight.do(key, lambda: self._refresh(key, compute))
+    
+    def invalidate(self, key: str) -> bool:
+        """Drop the entry so the next read recomputes it."""
+        return self.cache.delete(self.prefix, key)
+    
+    def _refresh(self, key: str, compute) -> Any:
+        value = compute()
+        self.cache.set(
+            self.prefix,
+            key,
+            {'value': value, 'cached_at': time.time()},
+            ttl=self.ttl + self.stale_window
+        )
+        return value
+    
+    def _refresh_in_background(self, key: str, compute) -> None:
+        # Only one refresh per key at a time; concurrent readers keep getting the stale value
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def _run():
+            try:
+                self._refresh(key, compute)
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {self.prefix}:{key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        
+        self._refresh_executor.submit(_run)
@@ -2,16 +2,26 @@
 import logging
 import re
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import threading
 import time
 import random
+import queue
+import uuid
+import atexit
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
 
 # Relative imports
 from ..config import (
     DEFAULT_USER_ID,
     MAX_HISTORY_TOKENS,
-    AUTO_MEMORIZE_COOLDOWN
+    AUTO_MEMORIZE_COOLDOWN,
+    BULK_RECORDER_SIZE,
+    BULK_RECORDER_FLUSH_TIMEOUT_MS,
+    BULK_RECORDER_QUEUE_SIZE,
+    MEMORY_EXTRACTION_WORKERS
 )
 from .llm_service import LLMService
 # from .analysis_service import MoodAnalyzer  # Removed in cleanup
@@ -20,10 +30,72 @@ from .embedding_service import EmbeddingManager
 from .cache_service import CacheManager, MoodContextCache, SearchResultCache
 from .tools import tools_instance
 from supabase import Client
+from postgrest.types import ReturnMethod
 
 logger = logging.getLogger(__name__)
 
+# User the current request (or greenlet / worker task) acts for; unlike threading.local this is per-greenlet and per-task
+_current_user_id = ContextVar("chat_current_user_id", default=None)
+
+_MOOD_STOP = object()  # Queued by ChatService.stop_mood_recorder to wake the recorder
+
+# Memory triggers run on every message, so they are compiled once into a single alternation each
+# High-probability memory extraction patterns (matched against lowercased input)
+_MEMORY_RICH_PATTERNS = re.compile("|".join([
+    r"i am (\w+)",
+    r"i'm (\w+)",
+    r"my name is (\w+)",
+    r"i work as (?:a |an )?([^,.!?]+)",
+    r"i live (?:in|at) ([^.!?]+)",
+    r"i have (?:a |an )?([^,.!?]+)",
+    r"my (\w+) is ([^.!?]+)",
+    r"i like (?:to )?([^,.!?]+)",
+    r"i don't like (?:to )?([^,.!?]+)",
+    r"i (?:go to|study at) ([^.!?]+)",
+    r"i graduated (?:from )?([^,.!?]+)",
+    r"i was born (?:in|at) ([^.!?]+)",
+    r"i'm from ([^.!?]+)",
+    r"my favorite ([^.!?]+)",
+    r"i'm feeling ([^.!?]+)",
+]))
+# Potential factual content in a user/bot exchange (matched against lowercased text)
+_MEMORIZABLE_PATTERNS = re.compile("|".join([
+    r"\bi am\b", r"\bi work\b", r"\bmy name\b", r"\bi live\b",
+    r"\bi have\b", r"\bi like\b", r"\bi don't like\b", r"\bmy \w+ is\b",
+    r"\bfamily\b", r"\bjob\b", r"\bwork\b", r"\bschool\b", r"\bhome\b",
+]))
+
 class ChatService:
+    # Recent (role, content) context per user; kept current by remember_chat_turn so back-to-back messages skip the query
+    RECENT_MESSAGES_LIMIT = 5
+    RECENT_MESSAGES_TTL = 30
+    # user_settings rows change only through the settings endpoints, which invalidate on write
+    USER_SETTINGS_TTL = 300
+    # Mood graph window behind /mood_logs; every mood_logs insert invalidates it
+    MOOD_LOGS_DAYS = 30
+    MOOD_LOGS_TTL = 45
+    # Quiet period after a user's last message before their conversation is mined for memories
+    MEMORY_EXTRACTION_DELAY = 600
+
+    # Fixed parts of the system prompt; only the mood/facts context line changes per message
+    PROMPT_RULES = (
+        "You are Warmth, a calm and supportive AI companion. "
+        "CRITICAL RULES:\n"
+        "- Keep replies short (1-3 sentences).\n"
+        "- NO pet names or flowery language.\n"
+        "- Be conversational, like a friend.\n"
+        "- Ask follow-up questions.\n"
+        "- Be supportive but grounded.\n"
+    )
+    PROMPT_TOOLS = (
+        "TOOLS (reply with JSON):\n"
+        "save_memory(key, value)\n"
+        "get_current_weather(location)\n"
+        "get_news_headlines(topic)\n"
+        "set_a_reminder(time, text)\n"
+        "Format: {\"tool_call\": \"name\", \"args\": {...}}"
+    )
+
     def __init__(self, supabase_client: Client, llm_service: LLMService,
                  analysis_service, safety_service: SafetyNet,
                  cache_manager: CacheManager):
@@ -38,8 +110,6 @@ class ChatService:
         self.search_result_cache = SearchResultCache(self.cache_manager)
 
         self.history = []
-        # Thread-local storage for request-specific context
-        self._local = threading.local()
         self.default_user_id = DEFAULT_USER_ID
         self.last_memorize_time = {}
         self.last_user_message_time = {}
@@ -48,9 +118,21 @@ class ChatService:
         self._journal_generation_locks = set() # Set of user_ids currently generating journals
         
         # Concurrency control
-        self._extraction_timer = None
+        # Per-user extraction deadlines (time.monotonic) served by one scheduler thread, started on first use
+        self._extraction_deadlines = {}
+        self._extraction_cv = threading.Condition()
+        self._extraction_scheduler = None
+        # Users whose extraction is running; guarded by _extraction_cv so one user never runs twice at once
+        self._extraction_in_flight = set()
+        # Extraction makes slow LLM calls, so it gets its own pool instead of holding chat-io workers
+        self._extraction_executor = ThreadPoolExecutor(max_workers=MEMORY_EXTRACTION_WORKERS, thread_name_prefix="memory-extraction")
         self._lock = threading.Lock()
-        self._extraction_lock = threading.Lock() # Dedicated lock for extraction logic
+        self._io_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="chat-io")
+        # mood_logs rows are inserted in bulk by a background recorder (see record_mood)
+        self._mood_queue = queue.Queue(maxsize=BULK_RECORDER_QUEUE_SIZE)
+        self._mood_recorder = None
+        # Set by stop_mood_recorder; from then on record_mood stores its row inline
+        self._mood_stop = threading.Event()
 
         self.listening_acknowledgements = [
             "I'm here.", "Tell me more.", "I'm listening.",
@@ -63,12 +145,21 @@ class ChatService:
     # ====== User Context Methods ======
 
     def set_user_context(self, user_id: str):
-        """Set the current user context for the request (Thread-Safe)."""
-        self._local.user_id = user_id
+        """Set the current user context for the request; returns a token for resetting it."""
+        return _current_user_id.set(user_id)
 
     def get_current_user_id(self) -> str:
         """Get the current user ID, falling back to default if not set."""
-        return getattr(self._local, 'user_id', self.default_user_id)
+        return _current_user_id.get() or self.default_user_id
+
+    @contextmanager
+    def user_scope(self, user_id: str):
+        """Acts as user_id inside the block and restores the previous user afterwards."""
+        token = _current_user_id.set(user_id)
+        try:
+            yield
+        finally:
+            _current_user_id.reset(token)
 
     def _run_in_background(self, target, *args):
         """Helper to run a method in a background thread."""
@@ -77,9 +168,9 @@ class ChatService:
             user_id = self.get_current_user_id()
             
             def _wrapper():
-                self.set_user_context(user_id)
                 try:
-                    target(*args)
+                    with self.user_scope(user_id):
+                        target(*args)
                 except Exception as e:
                     logger.error(f"Background task failed: {e}", exc_info=True)
             
@@ -88,23 +179,32 @@ class ChatService:
         except Exception as e:
             logger.error(f"Failed to start background task: {e}")
 
+    def _submit_for_user(self, target, *args):
+        """Runs a method on the I/O pool under the current user context; returns its future."""
+        user_id = self.get_current_user_id()
+
+        def _wrapper():
+            # Pool threads are reused, so the user is reset once the task finishes
+            with self.user_scope(user_id):
+                return target(*args)
+
+        return self._io_executor.submit(_wrapper)
+
     # ====== Supabase Helper Methods ======
 
     def _get_or_create_memory(self, key: str, value: str, importance: float = 0.8):
         """Get or create a memory in Supabase."""
         try:
             user_id = self.get_current_user_id()
-            # Check if memory already exists
-            existing = self.supabase.table('memories').select('id').eq('user_id', user_id).eq('key', key).execute()
+            # Update existing memory; the returned rows double as the existence check (one round trip, not two)
+            result = self.supabase.table('memories').update({
+                'value': value,
+                'importance': importance,
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            }).eq('user_id', user_id).eq('key', key).execute()
 
-            if existing.data:
-                # Update existing memory
-                result = self.supabase.table('memories').update({
-                    'value': value,
-                    'importance': importance,
-                    'updated_at': datetime.utcnow().isoformat()
-                }).eq('user_id', user_id).eq('key', key).execute()
-                memory_id = result.data[0]['id'] if result.data else None
+            if result.data:
+                memory_id = result.data[0]['id']
             else:
                 # Create new memory
                 result = self.supabase.table('memories').insert({
@@ -112,7 +212,7 @@ class ChatService:
                     'key': key,
                     'value': value,
                     'importance': importance,
-                    'timestamp': datetime.utcnow().isoformat()
+                    'timestamp': datetime.now(timezone.utc).isoformat()
                 }).execute()
                 memory_id = result.data[0]['id'] if result.data else None
             return memory_id
@@ -128,30 +228,154 @@ class ChatService:
                 'embedding': embedding.tolist() if hasattr(embedding, 'tolist') else embedding,
                 'embedding_model': model_name,
                 'embedding_dim': dim,
-                'embedded_at': datetime.utcnow().isoformat()
-            }).execute()
+                'embedded_at': datetime.now(timezone.utc).isoformat()
+            }, returning=ReturnMethod.minimal).execute()
         except Exception as e:
             logger.error(f"Failed to store embedding in Supabase: {e}")
 
     def _log_mood(self, score: float, label: str, topic: str = None):
         """Log mood data to Supabase."""
+        self.record_mood(self.get_current_user_id(), score, label, topic)
+
+    def record_mood(self, user_id: str, score: float, label: str, topic: str = None) -> dict:
+        """
+        Queues a mood_logs row for the background recorder and returns it.
+        The id is assigned here so callers can refer to the row before it is stored.
+        """
+        row = {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'score': score,
+            'label': label,
+            'topic': topic,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }
+        if self._mood_stop.is_set():
+            self._flush_moods([row])
+            return row
         try:
-            self.supabase.table('mood_logs').insert({
-                'user_id': self.get_current_user_id(),
-                'score': score,
-                'label': label,
-                'topic': topic,
-                'timestamp': datetime.utcnow().isoformat()
-            }).execute()
+            self._mood_queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("Mood queue is full; storing this mood inline")
+            self._flush_moods([row])
+        return row
+
+    def _flush_moods(self, batch):
+        """Stores queued mood rows with one insert, falling back to one insert per row."""
+        try:
+            self.supabase.table('mood_logs').insert(batch, returning=ReturnMethod.minimal).execute()
         except Exception as e:
-            logger.error(f"Failed to log mood in Supabase: {e}")
+            logger.warning(f"Bulk mood insert failed ({e}); storing {len(batch)} moods individually")
+            for row in batch:
+                try:
+                    self.supabase.table('mood_logs').insert(row, returning=ReturnMethod.minimal).execute()
+                except Exception as row_error:
+                    logger.error(f"Failed to log mood in Supabase: {row_error}")
+        # Invalidate after the write so a read in between cannot cache the window without these rows
+        for user_id in {row['user_id'] for row in batch}:
+            self.invalidate_mood_logs(user_id)
+
+    def _record_moods(self):
+        """Drains the mood queue: flushes every BULK_RECORDER_SIZE rows or BULK_RECORDER_FLUSH_TIMEOUT_MS."""
+        stopping = False
+        while not stopping:
+            row = self._mood_queue.get()
+            if row is _MOOD_STOP:
+                break
+            batch = [row]
+            deadline = time.monotonic() + BULK_RECORDER_FLUSH_TIMEOUT_MS / 1000
+            while len(batch) < BULK_RECORDER_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._mood_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _MOOD_STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            try:
+                self._flush_moods(batch)
+            except Exception as e:
+                logger.error(f"Failed to store moods: {e}")
+
+    def start_mood_recorder(self):
+        """Starts the background thread that persists queued moods (once per process)."""
+        if self._mood_recorder is None:
+            self._mood_recorder = threading.Thread(target=self._record_moods, daemon=True, name="MoodRecorder")
+            self._mood_recorder.start()
+            atexit.register(self.stop_mood_recorder)
+
+    def stop_mood_recorder(self, timeout: float = 10):
+        """
+        Stores every queued mood before the process exits; safe to call more than once.
+        Runs from gunicorn's worker_exit hook and atexit, since POST /mood already returned these rows' ids.
+        """
+        self._mood_stop.set()
+        recorder = self._mood_recorder
+        if recorder is not None and recorder.is_alive():
+            try:
+                self._mood_queue.put(_MOOD_STOP, timeout=timeout)
+                recorder.join(timeout)
+            except queue.Full:
+                logger.warning("Mood recorder did not drain the queue; flushing the rest here")
+
+        # Whatever the recorder did not reach (all of it, if it never started)
+        remaining = []
+        while True:
+            try:
+                row = self._mood_queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _MOOD_STOP:
+                remaining.append(row)
+        for start in range(0, len(remaining), BULK_RECORDER_SIZE):
+            try:
+                self._flush_moods(remaining[start:start + BULK_RECORDER_SIZE])
+            except Exception as e:
+                logger.error(f"Failed to store moods: {e}")
+
+    def get_mood_logs(self, user_id: str):
+        """
+        Returns (history, stale): the user's mood logs for the last MOOD_LOGS_DAYS days, newest first.
+        Cached per user; stale is True when Supabase failed and the last known window was served.
+        """
+        def _load():
+            cutoff_date = (datetime.now(timezone.utc) - timedelta(days=self.MOOD_LOGS_DAYS)).isoformat()
+            result = self.supabase.table('mood_logs').select('*').eq('user_id', user_id).gte('timestamp', cutoff_date).order('timestamp', desc=True).execute()
+            return result.data if result.data else []
+
+        return self.cache_manager.get_or_load("mood_logs", user_id, _load, ttl=self.MOOD_LOGS_TTL)
+
+    def invalidate_mood_logs(self, user_id: str):
+        """Drops the cached mood graph window after a mood is logged."""
+        self.cache_manager.delete_with_fallback("mood_logs", user_id)
+
+    def get_user_settings(self, user_id: str):
+        """
+        Returns (row, stale) for the user's user_settings row; row is None if they have none yet.
+        Cached per user; stale is True when Supabase failed and the last known row was served.
+        """
+        def _load():
+            result = self.supabase.table('user_settings').select('*').eq('user_id', user_id).execute()
+            # An empty dict caches "no row" so users on defaults do not query every time
+            return result.data[0] if result.data else {}
+
+        row, stale = self.cache_manager.get_or_load("user_settings", user_id, _load, ttl=self.USER_SETTINGS_TTL)
+        return row or None, stale
+
+    def invalidate_user_settings(self, user_id: str):
+        """Drops the cached user_settings row after it is written."""
+        self.cache_manager.delete_with_fallback("user_settings", user_id)
 
     def _get_user_preferences(self):
         """Get user preferences from Supabase."""
         try:
-            result = self.supabase.table('user_settings').select('*').eq('user_id', self.get_current_user_id()).execute()
-            if result.data:
-                return result.data[0]
+            prefs, _ = self.get_user_settings(self.get_current_user_id())
+            if prefs:
+                return prefs
             # Create default preferences if not found
             default_prefs = {
                 'user_id': self.get_current_user_id(),
@@ -160,7 +384,8 @@ class ChatService:
                 'listening_tts_muted': True,
                 'tts_enabled': False
             }
-            self.supabase.table('user_settings').insert(default_prefs).execute()
+            self.supabase.table('user_settings').insert(default_prefs, returning=ReturnMethod.minimal).execute()
+            self.invalidate_user_settings(self.get_current_user_id())
             return default_prefs
         except Exception as e:
             logger.error(f"Failed to get user preferences from Supabase: {e}")
@@ -192,7 +417,12 @@ class ChatService:
     def _get_mood_history(self, days: int = 7):
         """Get mood history from Supabase."""
         try:
-            cutoff_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
+            cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+            if days <= self.MOOD_LOGS_DAYS:
+                # Any window inside the /mood_logs one is a slice of that cached read
+                history, _ = self.get_mood_logs(self.get_current_user_id())
+                return [row for row in history if datetime.fromisoformat(row['timestamp']) >= cutoff]
+            cutoff_date = cutoff.isoformat()
             result = self.supabase.table('mood_logs').select('*').eq('user_id', self.get_current_user_id()).gte('timestamp', cutoff_date).order('timestamp', desc=True).execute()
             return result.data if result.data else []
         except Exception as e:
@@ -206,11 +436,38 @@ class ChatService:
                 'user_id': self.get_current_user_id(),
                 'role': role,
                 'content': content,
-                'timestamp': datetime.utcnow().isoformat()
-            }).execute()
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            }, returning=ReturnMethod.minimal).execute()
         except Exception as e:
             logger.error(f"Failed to add chat message to Supabase: {e}")
 
+    def _fetch_recent_messages(self, user_id: str, limit: int = RECENT_MESSAGES_LIMIT):
+        """Get the most recent (role, content) pairs, newest first (cached briefly per user)."""
+        cached = self.cache_manager.get("recent_messages", user_id)
+        if cached is not None:
+            return cached[:limit]
+        try:
+            result = self.supabase.table('messages').select('role, content').eq(
+                'user_id', user_id
+            ).order('created_at', desc=True).limit(self.RECENT_MESSAGES_LIMIT).execute()
+            messages = result.data if result.data else []
+            self.cache_manager.set("recent_messages", user_id, messages, ttl=self.RECENT_MESSAGES_TTL)
+            return messages[:limit]
+        except Exception as e:
+            logger.warning(f"Failed to get message context: {e}")
+            return []
+
+    def remember_chat_turn(self, user_id: str, user_message: str, reply: str):
+        """
+        Prepends a just-answered turn to the cached recent context.
+        Turns are stored asynchronously, so the cache may be ahead of the database; that is what the next message should see.
+        """
+        cached = self.cache_manager.get("recent_messages", user_id)
+        if cached is None:
+            return
+        messages = [{'role': 'assistant', 'content': reply}, {'role': 'user', 'content': user_message}] + cached
+        self.cache_manager.set("recent_messages", user_id, messages[:self.RECENT_MESSAGES_LIMIT], ttl=self.RECENT_MESSAGES_TTL)
+
     def _log_memory_access(self, memory_id: str, relevance_score: float = 0.5):
         """Log memory access in Supabase."""
         try:
@@ -219,8 +476,8 @@ class ChatService:
                 'user_id': self.get_current_user_id(),
                 'access_type': 'retrieve',
                 'relevance_score': relevance_score,
-                'accessed_at': datetime.utcnow().isoformat()
-            }).execute()
+                'accessed_at': datetime.now(timezone.utc).isoformat()
+            }, returning=ReturnMethod.minimal).execute()
         except Exception as e:
             logger.error(f"Failed to log memory access in Supabase: {e}")
 
@@ -293,11 +550,22 @@ class ChatService:
 
     # ====== Main Chat Methods ======
 
-    def generate_reply(self, user_input: str) -> str:
+    def generate_reply(self, user_input: str, analyze=None):
         """
         Main method to generate a reply.
-        Orchestrates safety, mood, memory, and LLM calls.
+        Returns (reply, recent_messages): the last few stored messages are fetched
+        concurrently with the reply so callers can reuse them for emotion analysis.
+        If analyze is given it is called with the recent messages while the reply is
+        still being generated, and its result is returned in place of recent_messages.
         """
+        context_future = self._io_executor.submit(self._fetch_recent_messages, self.get_current_user_id())
+        if analyze is not None:
+            context_future = self._io_executor.submit(lambda recent: analyze(recent.result()), context_future)
+        reply = self._generate_reply_text(user_input)
+        return reply, context_future.result()
+
+    def _generate_reply_text(self, user_input: str) -> str:
+        """Orchestrates safety, mood, memory, and LLM calls."""
 
         # Track conversation activity for autonomous memory extraction
         self._check_conversation_activity()
@@ -307,8 +575,13 @@ class ChatService:
         if self.safety_service.check_blocked(user_input):
             return self.safety_service.get_blocked_response()
 
+        # Preferences, mood and memory context are independent reads, so their round-trips overlap
+        prefs_future = self._submit_for_user(self._get_user_preferences)
+        mood_future = self._submit_for_user(self._get_mood_context)
+        facts_future = self._submit_for_user(self._get_memories_for_context, user_input)
+
         # Check for short replies
-        prefs = self._get_user_preferences()
+        prefs = prefs_future.result()
         if prefs and prefs.get('listening_mode', False) and len(user_input.strip()) <= 30:
             return self._get_listening_acknowledgement()
 
@@ -321,33 +594,14 @@ class ChatService:
         if self._should_extract_memories_now(user_input):
             self._run_in_background(self._enhanced_auto_memory_extraction, user_input)
 
-        # Get mood context for LLM (now includes the just-logged mood)
-        current_mood = self._get_mood_context()
-        facts = self._get_memories_for_context(user_input)
+        # Get mood context for LLM
+        current_mood = mood_future.result()
+        facts = facts_future.result()
 
         # Build system prompt with clean, minimal, modern personality
         # Build system prompt with clean, minimal, modern personality
         enhanced_system_prompt = self._build_prompt(current_mood, facts)
 
-    def _build_prompt(self, current_mood: str, facts: str) -> str:
-        """Builds the system prompt with personality and context."""
-        return (
-            "You are Warmth, a calm and supportive AI companion. "
-            "CRITICAL RULES:\n"
-            "- Keep replies short (1-3 sentences).\n"
-            "- NO pet names or flowery language.\n"
-            "- Be conversational, like a friend.\n"
-            "- Ask follow-up questions.\n"
-            "- Be supportive but grounded.\n"
-            f"Context: Mood={current_mood}. Facts={facts}\n\n"
-            f"TOOLS (reply with JSON):\n"
-            f"save_memory(key, value)\n"
-            f"get_current_weather(location)\n"
-            f"get_news_headlines(topic)\n"
-            f"set_a_reminder(time, text)\n"
-            f"Format: {{\"tool_call\": \"name\", \"args\": {{...}}}}"
-        )
-
         messages = [
             {"role": "system", "content": enhanced_system_prompt},
             *self.history,
@@ -400,6 +654,10 @@ class ChatService:
             logger.error(f"Chat generation error: {e}", exc_info=True)
             return "I'm having trouble responding right now. Could you try again?"
 
+    def _build_prompt(self, current_mood: str, facts: str) -> str:
+        """Builds the system prompt with personality and context."""
+        return f"{self.PROMPT_RULES}Context: Mood={current_mood}. Facts={facts}\n\n{self.PROMPT_TOOLS}"
+
     def generate_reply_stream(self, user_input: str):
         """
         Streaming version of generate_reply.
@@ -416,8 +674,13 @@ class ChatService:
             yield self.safety_service.get_blocked_response()
             return
 
+        # Preferences, mood and memory context are independent reads, so their round-trips overlap
+        prefs_future = self._submit_for_user(self._get_user_preferences)
+        mood_future = self._submit_for_user(self._get_mood_context)
+        facts_future = self._submit_for_user(self._get_memories_for_context, user_input)
+
         # Check for short replies in listening mode
-        prefs = self._get_user_preferences()
+        prefs = prefs_future.result()
         if prefs and prefs.get('listening_mode', False) and len(user_input.strip()) <= 30:
             yield self._get_listening_acknowledgement()
             return
@@ -431,8 +694,8 @@ class ChatService:
                 self._run_in_background(self._enhanced_auto_memory_extraction, user_input)
 
             # Get context for LLM
-            current_mood = self._get_mood_context()
-            facts = self._get_memories_for_context(user_input)
+            current_mood = mood_future.result()
+            facts = facts_future.result()
 
             # Build system prompt
             # Build system prompt
@@ -445,10 +708,11 @@ class ChatService:
             ]
 
             # Stream response from LLM
-            full_response = ""
+            tokens = []
             for token in self.llm_service.chat_stream(messages):
-                full_response += token
+                tokens.append(token)
                 yield token
+            full_response = ''.join(tokens)
 
             # Update history
             self.history.append({"role": "user", "content": user_input})
@@ -588,7 +852,7 @@ Be conservative - only save clear, specific, and important facts."""
             time.sleep(random.uniform(0.1, 0.5))
 
             # Check daily limit (max 3 automated journals per day)
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+            today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
             try:
                 # Get count and last journal time
                 journal_stats = self.supabase.table('journals')\
@@ -667,16 +931,17 @@ Be conservative - only save clear, specific, and important facts."""
                 journal_data = json.loads(clean_reply)
                 
                 # Save to Supabase
+                now = datetime.now(timezone.utc).isoformat()
                 self.supabase.table('journals').insert({
                     'user_id': user_id,
                     'title': journal_data.get('title', 'Reflections'),
                     'content': journal_data.get('content', ''),
                     'mood_score': journal_data.get('mood_score', 0),
                     'tags': journal_data.get('tags', []),
-                    'created_at': datetime.utcnow().isoformat(),
-                    'updated_at': datetime.utcnow().isoformat(),
+                    'created_at': now,
+                    'updated_at': now,
                     'is_automated': True
-                }).execute()
+                }, returning=ReturnMethod.minimal).execute()
                 
                 logger.info(f"Automated journal generated for user {user_id}")
 
@@ -691,48 +956,55 @@ Be conservative - only save clear, specific, and important facts."""
             self._journal_generation_locks.discard(user_id)
 
     def _schedule_memory_extraction(self):
-        """Schedules memory extraction after conversation ends (resettable timer)."""
+        """Schedules memory extraction after the user's conversation goes quiet (each message pushes it back)."""
         if not self.auto_memory_extraction_enabled:
             return
 
         user_id = self.get_current_user_id()
 
-        # Cancel existing timer if it exists
-        if self._extraction_timer:
-            try:
-                self._extraction_timer.cancel()
-            except Exception:
-                pass
-
-        def _delayed_extraction_wrapper():
-            try:
-                # Set user context for the thread
-                self.set_user_context(user_id)
-                
-                # Double check inactivity
-                current_time = datetime.utcnow()
-                if user_id in self.last_user_message_time:
-                    time_diff = current_time - self.last_user_message_time[user_id]
-                    # Allow a small buffer (e.g. 9.9 minutes) to account for timer drift
-                    if time_diff < timedelta(minutes=9.9):
-                        logger.info(f"Activity detected for {user_id}, skipping extraction.")
-                        return
-
-                with self._extraction_lock:
-                    logger.info(f"Starting scheduled memory extraction for {user_id}")
-                    self._summarize_and_save_memories()
-                    self._generate_automated_journal(user_id)
-                    logger.info(f"Scheduled extraction completed for {user_id}")
-                    
-            except Exception as e:
-                logger.error(f"Error in scheduled memory extraction: {e}", exc_info=True)
-
-        # Start new timer (10 minutes)
-        # We use a slightly longer delay in production, but for safety 600s is good
-        self._extraction_timer = threading.Timer(600, _delayed_extraction_wrapper)
-        self._extraction_timer.daemon = True
-        self._extraction_timer.start()
-        logger.debug(f"Scheduled memory extraction timer for {user_id} (600s)")
+        with self._extraction_cv:
+            self._extraction_deadlines[user_id] = time.monotonic() + self.MEMORY_EXTRACTION_DELAY
+            if self._extraction_scheduler is None:
+                self._extraction_scheduler = threading.Thread(target=self._run_extraction_scheduler, daemon=True, name="MemoryExtractionScheduler")
+                self._extraction_scheduler.start()
+            self._extraction_cv.notify()
+        logger.debug(f"Scheduled memory extraction for {user_id} ({self.MEMORY_EXTRACTION_DELAY}s)")
+
+    def _run_extraction_scheduler(self):
+        """Sleeps until the earliest deadline, then hands every user whose deadline has passed to the extraction pool."""
+        while True:
+            with self._extraction_cv:
+                while True:
+                    now = time.monotonic()
+                    due = [user_id for user_id, deadline in self._extraction_deadlines.items() if deadline <= now]
+                    if due:
+                        break
+                    # Woken early by notify() whenever a deadline is added or pushed back
+                    timeout = min(self._extraction_deadlines.values()) - now if self._extraction_deadlines else None
+                    self._extraction_cv.wait(timeout)
+                for user_id in due:
+                    if user_id in self._extraction_in_flight:
+                        # Still mining the previous quiet period; try again once this one has had time to finish
+                        self._extraction_deadlines[user_id] = now + self.MEMORY_EXTRACTION_DELAY
+                        continue
+                    del self._extraction_deadlines[user_id]
+                    self._extraction_in_flight.add(user_id)
+                    # Extraction makes LLM calls; running it here would make each due user wait on the ones before it
+                    self._extraction_executor.submit(self._run_scheduled_extraction, user_id)
+
+    def _run_scheduled_extraction(self, user_id: str):
+        """Summarizes the user's conversation into memories and writes their automated journal."""
+        try:
+            with self.user_scope(user_id):
+                logger.info(f"Starting scheduled memory extraction for {user_id}")
+                self._summarize_and_save_memories()
+                self._generate_automated_journal(user_id)
+                logger.info(f"Scheduled extraction completed for {user_id}")
+        except Exception as e:
+            logger.error(f"Error in scheduled memory extraction: {e}", exc_info=True)
+        finally:
+            with self._extraction_cv:
+                self._extraction_in_flight.discard(user_id)
 
     def _check_conversation_activity(self):
         """Updates last user message time and schedules memory extraction if needed."""
@@ -752,29 +1024,9 @@ Be conservative - only save clear, specific, and important facts."""
         if len(user_input_lower) < 15:
             return False
 
-        # High-probability memory extraction patterns
-        memory_rich_patterns = [
-            r"i am (\w+)",
-            r"i'm (\w+)",
-            r"my name is (\w+)",
-            r"i work as (?:a |an )?([^,.!?]+)",
-            r"i live (?:in|at) ([^.!?]+)",
-            r"i have (?:a |an )?([^,.!?]+)",
-            r"my (\w+) is ([^.!?]+)",
-            r"i like (?:to )?([^,.!?]+)",
-            r"i don't like (?:to )?([^,.!?]+)",
-            r"i (?:go to|study at) ([^.!?]+)",
-            r"i graduated (?:from )?([^,.!?]+)",
-            r"i was born (?:in|at) ([^.!?]+)",
-            r"i'm from ([^.!?]+)",
-            r"my favorite ([^.!?]+)",
-            r"i'm feeling ([^.!?]+)"
-        ]
-
         # Check if message contains memory-rich content
-        for pattern in memory_rich_patterns:
-            if re.search(pattern, user_input_lower):
-                return True
+        if _MEMORY_RICH_PATTERNS.search(user_input_lower):
+            return True
 
         # Check for lists of personal information
         if any(word in user_input_lower for word in ['family', 'children', 'kids', 'parents', 'siblings']):
@@ -796,16 +1048,23 @@ Be conservative - only save clear, specific, and important facts."""
             user_id = self.get_current_user_id()
             
             # Check daily limit (max 3 memories per day)
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+            now = datetime.now(timezone.utc)
+            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            today = today_start.date().isoformat()
+            # Once reached, the limit holds until midnight UTC, so later messages skip the count query
+            if self.cache_manager.get("memory_limit_reached", user_id) == today:
+                return {"status": "skipped", "reason": "daily_limit_reached"}
             try:
                 count_result = self.supabase.table('memories')\
                     .select('id', count='exact')\
                     .eq('user_id', user_id)\
-                    .gte('timestamp', today_start)\
+                    .gte('timestamp', today_start.isoformat())\
                     .execute()
                 
                 if count_result.count >= 3:
                     logger.info("Daily memory limit reached (3/3). Skipping extraction.")
+                    seconds_to_midnight = int((today_start + timedelta(days=1) - now).total_seconds()) + 1
+                    self.cache_manager.set("memory_limit_reached", user_id, today, ttl=seconds_to_midnight)
                     return {"status": "skipped", "reason": "daily_limit_reached"}
             except Exception as e:
                 logger.warning(f"Failed to check memory count: {e}")
@@ -893,21 +1152,16 @@ User message: """ + user_input
         Implements aggregation: Only logs if > 3 hours passed OR significant change (>0.3).
         """
         try:
-            # 1. Check last mood log time and score
+            # 1. Check last mood log time and score (newest row of the cached /mood_logs window)
             user_id = self.get_current_user_id()
             try:
-                last_log = self.supabase.table('mood_logs')\
-                    .select('score, timestamp')\
-                    .eq('user_id', user_id)\
-                    .order('timestamp', desc=True)\
-                    .limit(1)\
-                    .execute()
+                history, _ = self.get_mood_logs(user_id)
                 
                 should_log = True
                 last_score = 0
                 
-                if last_log.data:
-                    last_entry = last_log.data[0]
+                if history:
+                    last_entry = history[0]
                     last_time = datetime.fromisoformat(last_entry['timestamp'].replace('Z', '+00:00'))
                     last_score = last_entry['score']
                     
@@ -969,8 +1223,9 @@ User message: """ + user_input
                     'score': mood_score,
                     'label': mood_label,
                     'topic': detected_topic,
-                    'timestamp': datetime.utcnow().isoformat()
-                }).execute()
+                    'timestamp': datetime.now(timezone.utc).isoformat()
+                }, returning=ReturnMethod.minimal).execute()
+                self.invalidate_mood_logs(user_id)
                 
                 logger.info(f"Auto mood logged: score={mood_score:.2f}, label={mood_label}, topic={detected_topic}")
                 return {"score": mood_score, "label": mood_label, "topic": detected_topic}
@@ -1011,13 +1266,7 @@ User message: """ + user_input
             return False
 
         # Check for potential factual content patterns
-        memorizable_patterns = [
-            r"\bi am\b", r"\bi work\b", r"\bmy name\b", r"\bi live\b",
-            r"\bi have\b", r"\bi like\b", r"\bi don't like\b", r"\bmy \w+ is\b",
-            r"\bfamily\b", r"\bjob\b", r"\bwork\b", r"\bschool\b", r"\bhome\b"
-        ]
-
-        return any(re.search(pattern, combined_text) for pattern in memorizable_patterns)
+        return bool(_MEMORIZABLE_PATTERNS.search(combined_text))
 
     def _auto_memorize(self, user_input: str, bot_reply: str):
         """
@@ -1280,7 +1529,7 @@ User message: """ + user_input
         """Streams response token by token."""
         try:
             # Get full response first
-            full_response = self.generate_reply(user_input)
+            full_response, _ = self.generate_reply(user_input)
 
             # Stream it character by character for responsiveness
             for char in full_response:
@@ -1294,7 +1543,7 @@ User message: """ + user_input
     def get_recent_chat_messages(self, user_id: str, hours: int = 24):
         """Gets recent chat messages from Supabase."""
         try:
-            cutoff_time = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
+            cutoff_time = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
             result = self.supabase.table('messages').select('role, content, timestamp').eq('user_id', user_id).gte('timestamp', cutoff_time).order('timestamp', desc=True).execute()
             return result.data if result.data else []
         except Exception as e:
@@ -5,12 +5,13 @@ Uses OpenAI GPT-4 to analyze chat messages for emotions, topics, and sentiment.
 import os
 import json
 import logging
+from collections import Counter
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import openai
 from openai import OpenAI
 
-from ..config import ZAI_API_KEY, ZAI_BASE_URL
+from ..config import ZAI_API_KEY, ZAI_BASE_URL, ZAI_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,7 @@ class EmotionAnalysisService:
             logger.warning("ZAI_API_KEY not set - emotion analysis will be disabled")
             self.client = None
         else:
-            self.client = OpenAI(api_key=ZAI_API_KEY, base_url=ZAI_BASE_URL)
+            self.client = OpenAI(api_key=ZAI_API_KEY, base_url=ZAI_BASE_URL, timeout=ZAI_TIMEOUT)
     
     def analyze_message(self, message: str, context: List[Dict] = None) -> Dict:
         """
@@ -264,27 +265,21 @@ Return ONLY the JSON object."""
             return self._get_fallback_memory_graph()
             
         try:
-            # Extract user messages and topics
+            # Extract user messages and count topics in a single pass
             user_messages = []
-            all_topics = []
+            topic_counts = Counter()
             
             for msg in messages:
                 if msg.get('role') == 'user':
                     user_messages.append(msg.get('content', ''))
                     if msg.get('topics'):
-                        all_topics.extend(msg['topics'])
+                        topic_counts.update(msg['topics'])
             
             if not user_messages:
                 return self._get_fallback_memory_graph()
                 
-            # Calculate topic frequency
-            topic_counts = {}
-            for topic in all_topics:
-                topic_counts[topic] = topic_counts.get(topic, 0) + 1
-                
             # Get top 5 recurring topics
-            sorted_topics = sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-            top_topics = [t[0] for t in sorted_topics]
+            top_topics = [topic for topic, _ in topic_counts.most_common(5)]
             
             if not top_topics:
                 return self._get_fallback_memory_graph()
@@ -120,14 +120,14 @@ class LLMService:
             remaining_tokens -= msg_tokens
         
         result = [system_msg] + trimmed if system_msg else trimmed
-        logger.info(f"Trimmed input: {len(messages)} -> {len(result)} messages")
+        logger.info("Trimmed input: %d -> %d messages", len(messages), len(result))
         return result
 
     def _get_cache_key(self, messages: list[dict]) -> str:
         """Generate cache key from messages"""
         # Create deterministic string from messages
         msg_str = json.dumps(messages, sort_keys=True)
-        return hashlib.sha256(msg_str.encode()).hexdigest()
+        return hashlib.blake2b(msg_str.encode(), digest_size=16).hexdigest()
 
     def chat(self, messages: list[dict]) -> dict:
         """
@@ -152,7 +152,7 @@ class LLMService:
                     return cached_response
             
             # 4. Call Z.ai
-            llm_logger.info(f"Calling Z.ai API - Model: {self.model}, Base URL: {ZAI_BASE_URL}, Messages: {len(messages)}")
+            llm_logger.info("Calling Z.ai API - Model: %s, Base URL: %s, Messages: %d", self.model, ZAI_BASE_URL, len(messages))
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
@@ -211,7 +211,7 @@ class LLMService:
             # 2. Validate and trim input
             messages = self._validate_input(messages)
             
-            llm_logger.info(f"Z.ai streaming started - Model: {self.model}, Base URL: {ZAI_BASE_URL}")
+            llm_logger.info("Z.ai streaming started - Model: %s, Base URL: %s", self.model, ZAI_BASE_URL)
             
             # 3. Stream from Z.ai
             stream = self.client.chat.completions.create(
@@ -4,16 +4,96 @@ Supabase Authentication endpoints for Warmth AI
 Provides JWT-based authentication using Supabase Auth
 """
 import os
+import re
+import json
+import hashlib
 import logging
 import secrets
 from flask import Blueprint, request, jsonify, current_app
 from supabase import Client
 from .. import security_headers
-from ..security import require_auth
+from ..config import SUPABASE_URL
+from ..security import require_auth, extract_auth_token
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 logger = logging.getLogger(__name__)
 
+# Auth settings are fixed for the life of the process, so resolve them once at import
+_AUTH_ENABLED = os.getenv('ENABLE_AUTH', 'true').lower() == 'true'
+_DEV_USER_ENABLED = os.getenv('FLASK_ENV') == 'development' or os.getenv('ENABLE_DEV_USER', 'false').lower() == 'true'
+_ANON_KEY = os.getenv('SUPABASE_KEY', '')
+_ANON_KEY_PREFIX = _ANON_KEY[:10] + '...' if _ANON_KEY else None
+
+# Browsers may reuse /auth/config and /auth/status for this long (seconds)
+AUTH_CONFIG_MAX_AGE = 300
+
+_STATUS_PAYLOAD = {
+    "auth_enabled": _AUTH_ENABLED,
+    "supabase_url": SUPABASE_URL,
+    "supabase_anon_key": _ANON_KEY_PREFIX
+}
+if _AUTH_ENABLED:
+    _STATUS_PAYLOAD["message"] = "Supabase authentication is enabled"
+    _STATUS_PAYLOAD["auth_methods"] = ["email/password", "google", "github", "facebook"]
+else:
+    _STATUS_PAYLOAD["message"] = "Authentication is disabled (development mode)"
+
+# Supabase error messages we translate for the client, matched in a single case-insensitive pass
+_SIGNUP_ERRORS = re.compile(r'(?P<duplicate>already registered)|(?P<weak>weak password)|(?P<email>invalid email)', re.I)
+_SIGNUP_ERROR_RESPONSES = {
+    'duplicate': "Email already registered",
+    'weak': "Password is too weak",
+    'email': "Invalid email address"
+}
+_SIGNIN_ERRORS = re.compile(r'(?P<credentials>invalid login credentials)|(?P<unconfirmed>email not confirmed)', re.I)
+_SIGNIN_ERROR_RESPONSES = {
+    'credentials': "Invalid email or password",
+    'unconfirmed': "Please verify your email address"
+}
+
+_CONFIG_PAYLOAD = {
+    "supabase_url": SUPABASE_URL,
+    "supabase_anon_key": _ANON_KEY,
+    "enable_auth": _AUTH_ENABLED,
+    "enable_dev_user": _DEV_USER_ENABLED,
+    "providers": [
+        {"id": "email", "name": "Email", "icon": "email"},
+        {"id": "google", "name": "Google", "icon": "google"},
+        {"id": "github", "name": "GitHub", "icon": "github"},
+        {"id": "facebook", "name": "Facebook", "icon": "facebook"}
+    ]
+}
+
+# Credential payloads are well under 1KB; anything larger is rejected before JSON parsing
+AUTH_MAX_BODY_BYTES = 4096
+
+@bp.before_request
+def _limit_body_size():
+    """Rejects oversized or unsized request bodies on auth endpoints with O(1) work."""
+    if request.content_length is not None:
+        if request.content_length > AUTH_MAX_BODY_BYTES:
+            return jsonify({"error": "Payload too large"}), 413
+    elif 'chunked' in request.headers.get('Transfer-Encoding', '').lower():
+        return jsonify({"error": "Content-Length required"}), 411
+
+def _etag(payload):
+    """Derives a stable ETag from a static payload."""
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+_STATUS_ETAG = _etag(_STATUS_PAYLOAD)
+_CONFIG_ETAG = _etag(_CONFIG_PAYLOAD)
+
+def _cacheable(payload, etag):
+    """Builds a publicly cacheable JSON response for static auth metadata, or a 304 if the client is current."""
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = AUTH_CONFIG_MAX_AGE
+    return response
+
 @bp.route('/status', methods=['GET'])
 def auth_status():
     """
@@ -21,22 +101,7 @@ def auth_status():
     Returns authentication status and basic user info.
     """
     try:
-        # Check if authentication is enabled
-        enable_auth = os.getenv('ENABLE_AUTH', 'true').lower() == 'true'
-
-        response = {
-            "auth_enabled": enable_auth,
-            "supabase_url": current_app.supabase.supabase_url if hasattr(current_app, 'supabase') else None,
-            "supabase_anon_key": os.getenv('SUPABASE_KEY', '')[:10] + '...' if os.getenv('SUPABASE_KEY') else None
-        }
-
-        if enable_auth:
-            response["message"] = "Supabase authentication is enabled"
-            response["auth_methods"] = ["email/password", "google", "github", "facebook"]
-        else:
-            response["message"] = "Authentication is disabled (development mode)"
-
-        return jsonify(response), 200
+        return _cacheable(_STATUS_PAYLOAD, _STATUS_ETAG)
 
     except Exception as e:
         logger.error(f"Auth status error: {e}", exc_info=True)
@@ -75,34 +140,24 @@ def signup():
             }
         })
 
-        if result and hasattr(result, 'user'):
+        user = getattr(result, 'user', None)
+        session = getattr(result, 'session', None)
+        if user:
             logger.info(f"User registered successfully: {email}")
-            
-            # Insert user into users table for foreign key relationships
-            try:
-                supabase.table('users').insert({
-                    'id': result.user.id,
-                    'email': result.user.email,
-                    'full_name': full_name,
-                    'created_at': 'now()'
-                }).execute()
-                logger.info(f"User record created in users table: {result.user.id}")
-            except Exception as db_error:
-                logger.warning(f"Failed to create user record in users table: {db_error}")
-                # Continue anyway - the auth user is created
+            # The public.users row is created by the on_auth_user_created trigger
             
             # Build response
             response_data = {
                 "status": "success",
-                "user_id": result.user.id,
-                "email": result.user.email
+                "user_id": user.id,
+                "email": user.email
             }
             
             # If Supabase auto-confirmed the email, return the session token for auto-login
-            if hasattr(result, 'session') and result.session:
-                response_data["access_token"] = result.session.access_token
-                response_data["refresh_token"] = result.session.refresh_token
-                response_data["expires_in"] = result.session.expires_in
+            if session:
+                response_data["access_token"] = session.access_token
+                response_data["refresh_token"] = session.refresh_token
+                response_data["expires_in"] = session.expires_in
                 response_data["message"] = "Account created successfully"
             else:
                 # Email confirmation required
@@ -115,18 +170,14 @@ def signup():
     except Exception as e:
         logger.error(f"Signup error: {e}", exc_info=True)
         # Handle Supabase specific errors
-        error_msg = str(e)
-        if "already registered" in error_msg.lower():
-            return jsonify({"error": "Email already registered"}), 400
-        elif "weak password" in error_msg.lower():
-            return jsonify({"error": "Password is too weak"}), 400
-        elif "invalid email" in error_msg.lower():
-            return jsonify({"error": "Invalid email address"}), 400
+        match = _SIGNUP_ERRORS.search(str(e))
+        if match:
+            return jsonify({"error": _SIGNUP_ERROR_RESPONSES[match.lastgroup]}), 400
 
         return jsonify({"error": "Registration failed"}), 500
 
 @bp.route('/signin', methods=['POST'])
-@security_headers.dev_bypass_rate_limit("10 per minute")
+@security_headers.dev_bypass_rate_limit("5 per 15 minutes", key_func=security_headers.auth_rate_limit_key)
 def signin():
     """
     POST /auth/signin
@@ -151,17 +202,19 @@ def signin():
             "password": password
         })
 
-        if result and hasattr(result, 'user') and hasattr(result, 'session'):
+        user = getattr(result, 'user', None)
+        session = getattr(result, 'session', None)
+        if user and session:
             logger.info(f"User signed in successfully: {email}")
             return jsonify({
                 "status": "success",
                 "message": "Signed in successfully",
-                "access_token": result.session.access_token,
-                "refresh_token": result.session.refresh_token,
-                "user_id": result.user.id,
-                "email": result.user.email,
-                "full_name": result.user.user_metadata.get('full_name', '') if result.user.user_metadata else '',
-                "expires_in": result.session.expires_in
+                "access_token": session.access_token,
+                "refresh_token": session.refresh_token,
+                "user_id": user.id,
+                "email": user.email,
+                "full_name": user.user_metadata.get('full_name', '') if user.user_metadata else '',
+                "expires_in": session.expires_in
             }), 200
         else:
             return jsonify({"error": "Invalid credentials"}), 401
@@ -169,15 +222,14 @@ def signin():
     except Exception as e:
         logger.error(f"Signin error: {e}", exc_info=True)
         # Handle Supabase specific errors
-        error_msg = str(e)
-        if "invalid login credentials" in error_msg.lower():
-            return jsonify({"error": "Invalid email or password"}), 401
-        elif "email not confirmed" in error_msg.lower():
-            return jsonify({"error": "Please verify your email address"}), 401
+        match = _SIGNIN_ERRORS.search(str(e))
+        if match:
+            return jsonify({"error": _SIGNIN_ERROR_RESPONSES[match.lastgroup]}), 401
 
         return jsonify({"error": "Sign in failed"}), 500
 
 @bp.route('/google', methods=['POST'])
+@security_headers.dev_bypass_rate_limit("10 per minute")
 def google_auth():
     """
     POST /auth/google
@@ -197,30 +249,21 @@ def google_auth():
             "token": token
         })
 
-        if result and hasattr(result, 'user') and hasattr(result, 'session'):
-            user = result.user
+        user = getattr(result, 'user', None)
+        session = getattr(result, 'session', None)
+        if user and session:
             logger.info(f"User signed in with Google: {user.email}")
-            
-            # Ensure user exists in our users table
-            try:
-                supabase.table('users').upsert({
-                    'id': user.id,
-                    'email': user.email,
-                    'full_name': user.user_metadata.get('full_name', user.user_metadata.get('name', '')),
-                    'created_at': 'now()'
-                }).execute()
-            except Exception as db_error:
-                logger.warning(f"Failed to upsert user record: {db_error}")
+            # First-time Google users get their public.users row from the on_auth_user_created trigger
 
             return jsonify({
                 "status": "success",
                 "message": "Signed in successfully",
-                "access_token": result.session.access_token,
-                "refresh_token": result.session.refresh_token,
+                "access_token": session.access_token,
+                "refresh_token": session.refresh_token,
                 "user_id": user.id,
                 "email": user.email,
                 "full_name": user.user_metadata.get('full_name', ''),
-                "expires_in": result.session.expires_in
+                "expires_in": session.expires_in
             }), 200
         else:
             return jsonify({"error": "Invalid Google token"}), 401
@@ -230,6 +273,7 @@ def google_auth():
         return jsonify({"error": "Google authentication failed"}), 500
 
 @bp.route('/refresh', methods=['POST'])
+@security_headers.dev_bypass_rate_limit("30 per minute")
 def refresh_token():
     """
     POST /auth/refresh
@@ -246,13 +290,14 @@ def refresh_token():
         # Refresh the session
         result = supabase.auth.refresh_session(refresh_token)
 
-        if result and hasattr(result, 'session'):
+        session = getattr(result, 'session', None)
+        if session:
             logger.info("Token refreshed successfully")
             return jsonify({
                 "status": "success",
-                "access_token": result.session.access_token,
-                "refresh_token": result.session.refresh_token,
-                "expires_in": result.session.expires_in
+                "access_token": session.access_token,
+                "refresh_token": session.refresh_token,
+                "expires_in": session.expires_in
             }), 200
         else:
             return jsonify({"error": "Invalid refresh token"}), 401
@@ -269,11 +314,10 @@ def signout():
     """
     try:
         # Get the JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
+        jwt_token = extract_auth_token()
+        if not jwt_token:
             return jsonify({"error": "Authorization header required"}), 401
 
-        jwt_token = auth_header[7:]  # Remove 'Bearer ' prefix
         supabase: Client = current_app.supabase
 
         # Sign out user with Supabase
@@ -346,7 +390,7 @@ def create_dev_user():
 
     try:
         # Check if development mode is enabled (TEMPORARILY OVERRIDE FOR TESTING)
-        dev_mode = (os.getenv('FLASK_ENV') == 'development' or os.getenv('ENABLE_DEV_USER', 'false').lower() == 'true')
+        dev_mode = _DEV_USER_ENABLED
 
         # TEMPORARY: Force enable for testing if not explicitly production
         if not dev_mode and not os.getenv('PRODUCTION_MODE'):
@@ -367,8 +411,8 @@ def create_dev_user():
         import uuid
         import hashlib
         
-        # Create a deterministic UUID from the user_id string
-        hash_obj = hashlib.md5(user_id_input.encode())
+        # Create a deterministic UUID from the user_id string (16-byte BLAKE2b digest)
+        hash_obj = hashlib.blake2b(user_id_input.encode(), digest_size=16)
         mock_user_id = str(uuid.UUID(hash_obj.hexdigest()))
         
         dev_email = f"{user_id_input}@warmth.local"
@@ -379,17 +423,15 @@ def create_dev_user():
 
         # Ensure user exists in the users table
         try:
-            # Check if user exists
-            existing = supabase.table('users').select('id').eq('id', mock_user_id).execute()
-            
-            if not existing.data:
-                # Insert new dev user
-                supabase.table('users').insert({
-                    'id': mock_user_id,
-                    'email': dev_email,
-                    'full_name': display_name,
-                    'created_at': 'now()'
-                }).execute()
+            # Single race-free round-trip: inserts only if the id is not already present
+            created = supabase.table('users').upsert({
+                'id': mock_user_id,
+                'email': dev_email,
+                'full_name': display_name,
+                'created_at': 'now()'
+            }, on_conflict='id', ignore_duplicates=True).execute()
+
+            if created.data:
                 logger.info(f"Created new dev user in DB: {mock_user_id}")
             else:
                 logger.info(f"Dev user already exists in DB: {mock_user_id}")
@@ -448,21 +490,7 @@ def auth_config():
     Get Supabase authentication configuration for frontend
     """
     try:
-        supabase_url = current_app.supabase.supabase_url if hasattr(current_app, 'supabase') else None
-        anon_key = os.getenv('SUPABASE_KEY', '')
-
-        return jsonify({
-            "supabase_url": supabase_url,
-            "supabase_anon_key": anon_key,
-            "enable_auth": os.getenv('ENABLE_AUTH', 'true').lower() == 'true',
-            "enable_dev_user": os.getenv('FLASK_ENV') == 'development' or os.getenv('ENABLE_DEV_USER', 'false').lower() == 'true',
-            "providers": [
-                {"id": "email", "name": "Email", "icon": "email"},
-                {"id": "google", "name": "Google", "icon": "google"},
-                {"id": "github", "name": "GitHub", "icon": "github"},
-                {"id": "facebook", "name": "Facebook", "icon": "facebook"}
-            ]
-        }), 200
+        return _cacheable(_CONFIG_PAYLOAD, _CONFIG_ETAG)
 
     except Exception as e:
         logger.error(f"Auth config error: {e}", exc_info=True)
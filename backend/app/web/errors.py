@@ -1,59 +1,74 @@
 # app/web/errors.py
+import json
 import logging
-from flask import Blueprint, jsonify, request
+from functools import lru_cache
+from flask import Blueprint, Response, request
 from flask_limiter.util import get_remote_address
 
 bp = Blueprint('errors', __name__)
 logger = logging.getLogger(__name__)
 
+def _encode(error: str, message: str) -> bytes:
+    return json.dumps({"error": error, "message": message}).encode()
+
+# Error bodies never change, so serialize them once at import
+_BODY_500 = _encode("Internal Server Error", "An unexpected error occurred. Please try again later.")
+_BODY_404 = _encode("Not Found", "The requested resource was not found.")
+_BODY_429 = _encode("Too Many Requests", "Too many attempts. Please wait and try again.")
+_BODY_415 = _encode("Unsupported Media Type", "Content-Type must be application/json")
+_BODY_401 = _encode("Unauthorized", "Authentication required")
+_BODY_403 = _encode("Forbidden", "CSRF token validation failed")
+
+def _error_response(body: bytes, status: int) -> Response:
+    """Wraps a pre-encoded body in a fresh Response (after_request hooks mutate headers, so never share one)."""
+    return Response(body, status=status, mimetype='application/json')
+
+@lru_cache(maxsize=256)
+def _encode_error(error: str) -> bytes:
+    return json.dumps({"error": error}).encode()
+
+def json_error(error: str, status: int) -> Response:
+    """
+    Returns a {"error": ...} response for a fixed message, serializing each message only once.
+    Only pass static strings - interpolated messages would fill the cache.
+    """
+    return _error_response(_encode_error(error), status)
+
+def mark_stale(response: Response) -> Response:
+    """Flags a response built from last-known-good cached data because the database was unreachable."""
+    response.headers['Warning'] = '110 - "Response is Stale"'
+    response.headers['X-Cache'] = 'STALE'
+    return response
+
 @bp.app_errorhandler(500)
 def handle_500_error(error):
     """Global handler for 500 Internal Server Errors."""
     logger.error(f"500 Internal Server Error: {error}", exc_info=True)
-    return jsonify({
-        "error": "Internal Server Error",
-        "message": "An unexpected error occurred. Please try again later."
-    }), 500
+    return _error_response(_BODY_500, 500)
 
 @bp.app_errorhandler(404)
 def handle_404_error(error):
     """Global handler for 404 Not Found errors."""
     logger.warning(f"404 Not Found: {request.path}")
-    return jsonify({
-        "error": "Not Found",
-        "message": "The requested resource was not found."
-    }), 404
+    return _error_response(_BODY_404, 404)
 
 @bp.app_errorhandler(429)
 def handle_429_error(error):
     """Global handler for 429 Too Many Requests (rate limiting)."""
     logger.warning(f"429 Rate Limit Exceeded: {get_remote_address()} - Error details: {error}")
-    # For now, just return success to bypass rate limiting temporarily
-    return jsonify({
-        "status": "bypassed",
-        "message": "Rate limiting temporarily disabled"
-    }), 200
+    return _error_response(_BODY_429, 429)
 
 @bp.app_errorhandler(415)
 def handle_415_error(error):
     """Global handler for 415 Unsupported Media Type."""
-    return jsonify({
-        "error": "Unsupported Media Type",
-        "message": "Content-Type must be application/json"
-    }), 415
+    return _error_response(_BODY_415, 415)
 
 @bp.app_errorhandler(401)
 def handle_401_error(error):
     """Global handler for 401 Unauthorized."""
-    return jsonify({
-        "error": "Unauthorized",
-        "message": "Authentication required"
-    }), 401
+    return _error_response(_BODY_401, 401)
 
 @bp.app_errorhandler(403)
 def handle_403_error(error):
     """Global handler for 403 Forbidden (CSRF)."""
-    return jsonify({
-        "error": "Forbidden",
-        "message": "CSRF token validation failed"
-    }), 403
\ No newline at end of file
+    return _error_response(_BODY_403, 403)
\ No newline at end of file
@@ -3,18 +3,38 @@
 Export/Import endpoints for user data
 """
 import logging
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from ..security import require_auth
+from .insights import invalidate_insights_cache
 
 bp = Blueprint('export', __name__)
 logger = logging.getLogger(__name__)
 
+# Tables included in a full export, streamed in this order
+EXPORT_TABLES = ('messages', 'memories', 'mood_logs', 'emotional_recaps')
+EXPORT_PAGE_SIZE = 1000
+
+def iter_user_rows(supabase, table, user_id, page_size=EXPORT_PAGE_SIZE):
+    """Yields a user's rows from a table one page at a time, seeking past the last id on (user_id, id)."""
+    last_id = None
+    while True:
+        query = supabase.table(table).select('*').eq('user_id', user_id)
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        result = query.order('id').limit(page_size).execute()
+        rows = result.data or []
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]['id']
+
 @bp.route('/export-all', methods=['GET'])
 @require_auth
 def export_all_data():
     """
     GET /export-all
-    Exports all user data (messages, memories, mood logs, etc.)
+    Exports all user data (messages, memories, mood logs, etc.) as NDJSON.
+    Each table starts with a {"table": name} header line followed by one line per row.
     """
     try:
         current_user_id = request.current_user['id']
@@ -22,44 +42,23 @@ def export_all_data():
         
         supabase = current_app.supabase
         
-        # Fetch all data for the user
-        data = {}
-        
-        # Messages
-        try:
-            messages_result = supabase.table('messages').select('*').eq('user_id', current_user_id).execute()
-            data['messages'] = messages_result.data if messages_result.data else []
-        except Exception as e:
-            logger.warning(f"Failed to fetch messages: {e}")
-            data['messages'] = []
-        
-        # Memories
-        try:
-            memories_result = supabase.table('memories').select('*').eq('user_id', current_user_id).execute()
-            data['memories'] = memories_result.data if memories_result.data else []
-        except Exception as e:
-            logger.warning(f"Failed to fetch memories: {e}")
-            data['memories'] = []
-        
-        # Mood logs
-        try:
-            mood_logs_result = supabase.table('mood_logs').select('*').eq('user_id', current_user_id).execute()
-            data['mood_logs'] = mood_logs_result.data if mood_logs_result.data else []
-        except Exception as e:
-            logger.warning(f"Failed to fetch mood logs: {e}")
-            data['mood_logs'] = []
-        
-        # Emotional recaps
-        try:
-            recaps_result = supabase.table('emotional_recaps').select('*').eq('user_id', current_user_id).execute()
-            data['emotional_recaps'] = recaps_result.data if recaps_result.data else []
-        except Exception as e:
-            logger.warning(f"Failed to fetch emotional recaps: {e}")
-            data['emotional_recaps'] = []
-        
-        logger.info(f"Exported {len(data['messages'])} messages, {len(data['memories'])} memories for user {current_user_id}")
-        
-        return jsonify(data), 200
+        def _generate():
+            json_provider = current_app.json
+            counts = {}
+            for table in EXPORT_TABLES:
+                yield json_provider.dumps({"table": table}) + "\n"
+                counts[table] = 0
+                try:
+                    for row in iter_user_rows(supabase, table, current_user_id):
+                        counts[table] += 1
+                        yield json_provider.dumps(row) + "\n"
+                except Exception as e:
+                    logger.warning(f"Failed to fetch {table}: {e}")
+                    yield json_provider.dumps({"table": table, "error": f"Failed to export {table}"}) + "\n"
+            
+            logger.info(f"Exported {counts['messages']} messages, {counts['memories']} memories for user {current_user_id}")
+        
+        return Response(stream_with_context(_generate()), mimetype='application/x-ndjson'), 200
         
     except Exception as e:
         logger.error(f"Export all data error: {e}", exc_info=True)
@@ -79,40 +78,12 @@ def erase_all_data():
         
         supabase = current_app.supabase
         
-        # Delete all data for the user
-        deleted_counts = {}
-        
-        # Delete messages
-        try:
-            supabase.table('messages').delete().eq('user_id', current_user_id).execute()
-            deleted_counts['messages'] = 'deleted'
-        except Exception as e:
-            logger.error(f"Failed to delete messages: {e}")
-            deleted_counts['messages'] = 'failed'
-        
-        # Delete memories
-        try:
-            supabase.table('memories').delete().eq('user_id', current_user_id).execute()
-            deleted_counts['memories'] = 'deleted'
-        except Exception as e:
-            logger.error(f"Failed to delete memories: {e}")
-            deleted_counts['memories'] = 'failed'
-        
-        # Delete mood logs
-        try:
-            supabase.table('mood_logs').delete().eq('user_id', current_user_id).execute()
-            deleted_counts['mood_logs'] = 'deleted'
-        except Exception as e:
-            logger.error(f"Failed to delete mood logs: {e}")
-            deleted_counts['mood_logs'] = 'failed'
-        
-        # Delete emotional recaps
-        try:
-            supabase.table('emotional_recaps').delete().eq('user_id', current_user_id).execute()
-            deleted_counts['emotional_recaps'] = 'deleted'
-        except Exception as e:
-            logger.error(f"Failed to delete emotional recaps: {e}")
-            deleted_counts['emotional_recaps'] = 'failed'
+        # One RPC deletes every table inside a single transaction (all-or-nothing)
+        result = supabase.rpc('erase_user_data', {'p_user_id': current_user_id}).execute()
+        deleted_counts = result.data or {}
+        invalidate_insights_cache(current_user_id)
+        current_app.chat_service.invalidate_user_settings(current_user_id)
+        current_app.chat_service.invalidate_mood_logs(current_user_id)
         
         logger.info(f"Erase complete for user {current_user_id}: {deleted_counts}")
         
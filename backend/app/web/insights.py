@@ -1,13 +1,126 @@
 # app/web/insights.py
 import logging
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from openai import DEFAULT_MAX_RETRIES
 from flask import Blueprint, jsonify, current_app, request
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from ..config import PRIVATE_CACHE_CONTROL, ZAI_TIMEOUT
 from ..security import require_auth
 from ..services.emotion_analysis_service import get_emotion_service
+from ..services.cache_service import StaleWhileRevalidateCache, SingleFlight
+from .errors import json_error
+from .main import write_executor
 
 bp = Blueprint('insights', __name__)
 logger = logging.getLogger(__name__)
 
+# Per-user stale-while-revalidate caches (seconds fresh, then seconds served stale while refreshing)
+RECAP_CACHE_TTL = 300
+RECAP_CACHE_STALE_WINDOW = 3600
+MEMORY_GRAPH_CACHE_TTL = 60
+MEMORY_GRAPH_CACHE_STALE_WINDOW = 600
+# Exactly the fields GET /recap returns, so rows pass straight through
+RECAP_FIELDS = 'id, headline, narrative, top_emotions, key_topics, recommendations, start_date, end_date, created_at'
+
+# Computed graphs keyed by the user's newest message, so a refresh with no new activity skips the rebuild
+MEMORY_GRAPH_VERSION_TTL = 3600
+
+_recap_cache = None
+_memory_graph_cache = None
+
+# A second generate request for a user while one is running waits for and returns the first one's recap.
+# It outwaits the first one's LLM call (ZAI_TIMEOUT per attempt, plus the client's retries) and its two queries.
+RECAP_GENERATION_WAIT = ZAI_TIMEOUT * (DEFAULT_MAX_RETRIES + 1) + 30
+_recap_generation = SingleFlight(timeout=RECAP_GENERATION_WAIT)
+
+def _get_caches():
+    """Returns the shared recap and memory-graph caches, creating them on first use."""
+    global _recap_cache, _memory_graph_cache
+    if _recap_cache is None:
+        cache_manager = current_app.chat_service.cache_manager
+        _recap_cache = StaleWhileRevalidateCache(cache_manager, "recap_latest", RECAP_CACHE_TTL, RECAP_CACHE_STALE_WINDOW)
+        _memory_graph_cache = StaleWhileRevalidateCache(cache_manager, "memory_graph", MEMORY_GRAPH_CACHE_TTL, MEMORY_GRAPH_CACHE_STALE_WINDOW)
+    return _recap_cache, _memory_graph_cache
+
+def _private_cacheable(payload):
+    """Builds a JSON response that the client may reuse briefly (responses differ per Authorization)."""
+    response = jsonify(payload)
+    response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+    response.headers['Vary'] = 'Authorization'
+    return response
+
+def invalidate_insights_cache(user_id):
+    """Drops a user's cached recap and memory graph (e.g. after their data is erased)."""
+    recap_cache, memory_graph_cache = _get_caches()
+    recap_cache.invalidate(user_id)
+    memory_graph_cache.invalidate(user_id)
+
+def _mark_recap_viewed(supabase, recap_id):
+    """Sets the viewed flag on a recap; best effort, run on the write executor."""
+    try:
+        supabase.table('emotional_recaps').update({
+            'viewed': True
+        }, returning=ReturnMethod.minimal).eq('id', recap_id).execute()
+    except Exception as e:
+        logger.warning(f"Failed to mark recap as viewed: {e}")
+
+def _load_latest_recap(supabase, user_id):
+    """Fetches the latest recap for a user and marks it as viewed."""
+    # Get the latest recap
+    result = supabase.table('emotional_recaps').select(RECAP_FIELDS).eq(
+        'user_id', user_id
+    ).order('created_at', desc=True).limit(1).execute()
+    
+    if not result.data:
+        # If no recap, check if we need to generate one
+        # This logic was previously in /recap/check, now we can just return 404 or empty
+        return {"recap": None}
+    
+    recap = result.data[0]
+    
+    # Mark as viewed without holding up the response
+    write_executor.submit(_mark_recap_viewed, supabase, recap['id'])
+    
+    return {"recap": recap}
+
+def _load_memory_graph(supabase, cache_manager, user_id):
+    """Builds the memory graph from the user's last 1000 messages, reusing it until they send a new one."""
+    emotion_service = get_emotion_service()
+    
+    # The newest message timestamp identifies the graph; unchanged means the previous result still holds
+    latest = supabase.table('messages').select('created_at').eq(
+        'user_id', user_id
+    ).eq('role', 'user').order('created_at', desc=True).limit(1).execute()
+    
+    if not latest.data:
+        return {"memories": []}
+    
+    version_key = f"{user_id}:{latest.data[0]['created_at']}"
+    cached = cache_manager.get("memory_graph_version", version_key)
+    if cached is not None:
+        return cached
+    
+    # Fetch only what the graph reads: the user's own turns, content and topics (last 1000 for performance)
+    result = supabase.table('messages').select('role, content, topics').eq(
+        'user_id', user_id
+    ).eq('role', 'user').order('created_at', desc=True).limit(1000).execute()
+    
+    if not result.data:
+        return {"memories": []}
+        
+    # Generate memory graph
+    # Reverse in place to chronological order for analysis
+    messages = result.data
+    messages.reverse()
+    memory_graph = emotion_service.get_memory_graph(messages, user_id)
+    
+    # Fallback graphs mean the analysis failed; let the next refresh retry
+    if not memory_graph.get('fallback'):
+        cache_manager.set("memory_graph_version", version_key, memory_graph, ttl=MEMORY_GRAPH_VERSION_TTL)
+    return memory_graph
+
 @bp.route('/recap', methods=['GET'])
 @require_auth
 def get_latest_recap():
@@ -20,74 +133,38 @@ def get_latest_recap():
         user_id = request.current_user['id']
         
         supabase = current_app.supabase
+        recap_cache, _ = _get_caches()
         
-        # Get the latest recap
-        result = supabase.table('emotional_recaps').select('*').eq(
-            'user_id', user_id
-        ).order('created_at', desc=True).limit(1).execute()
-        
-        if not result.data:
-            # If no recap, check if we need to generate one
-            # This logic was previously in /recap/check, now we can just return 404 or empty
-            return jsonify({"recap": None}), 200
-        
-        recap = result.data[0]
-        
-        # Mark as viewed
-        try:
-            supabase.table('emotional_recaps').update({
-                'viewed': True
-            }).eq('id', recap['id']).execute()
-        except Exception as e:
-            logger.warning(f"Failed to mark recap as viewed: {e}")
-        
-        return jsonify({
-            "recap": {
-                "id": recap['id'],
-                "headline": recap['headline'],
-                "narrative": recap['narrative'],
-                "top_emotions": recap['top_emotions'],
-                "key_topics": recap['key_topics'],
-                "recommendations": recap['recommendations'],
-                "start_date": recap['start_date'],
-                "end_date": recap['end_date'],
-                "created_at": recap['created_at']
-            }
-        }), 200
+        payload = recap_cache.get_or_compute(user_id, lambda: _load_latest_recap(supabase, user_id))
+        return _private_cacheable(payload), 200
         
     except Exception as e:
         logger.error(f"GET /recap error: {e}", exc_info=True)
-        return jsonify({"error": "Failed to get recap"}), 500
+        return json_error("Failed to get recap", 500)
 
-@bp.route('/recap/generate', methods=['POST'])
-@require_auth
-def generate_recap():
+def _create_recap(supabase, user_id):
     """
-    POST /insights/recap/generate
-    Generate a new 3-day emotional recap for the user.
+    Generates and stores a 3-day recap for a user.
+    
+    Returns:
+        tuple: (response payload, HTTP status)
     """
+    emotion_service = get_emotion_service()
+    
+    # Get messages from the last 3 days
+    three_days_ago = (datetime.now(timezone.utc) - timedelta(days=3)).isoformat()
+    result = supabase.table('messages').select('*').eq(
+        'user_id', user_id
+    ).gte('created_at', three_days_ago).order('created_at', desc=True).execute()
+    
+    if not result.data or len(result.data) < 3:
+        return {"error": "Not enough messages for a recap"}, 400
+    
+    # Generate the recap
+    recap_data = emotion_service.generate_3day_recap(result.data, user_id)
+    
+    # Store the recap
     try:
-        user = getattr(request, 'current_user', None)
-        if not user:
-            return jsonify({"error": "Unauthorized"}), 401
-        
-        user_id = user.get('id')
-        supabase = current_app.supabase
-        emotion_service = get_emotion_service()
-        
-        # Get messages from the last 3 days
-        three_days_ago = (datetime.utcnow() - timedelta(days=3)).isoformat()
-        result = supabase.table('messages').select('*').eq(
-            'user_id', user_id
-        ).gte('created_at', three_days_ago).order('created_at', desc=True).execute()
-        
-        if not result.data or len(result.data) < 3:
-            return jsonify({"error": "Not enough messages for a recap"}), 400
-        
-        # Generate the recap
-        recap_data = emotion_service.generate_3day_recap(result.data, user_id)
-        
-        # Store the recap
         stored_recap = supabase.table('emotional_recaps').insert({
             'user_id': user_id,
             'start_date': recap_data['start_date'],
@@ -99,21 +176,54 @@ def generate_recap():
             'recommendations': recap_data['recommendations'],
             'viewed': False
         }).execute()
+    except APIError as e:
+        if e.code != '23505':
+            raise
+        # Another worker already stored today's recap (one per user per day) - return that one
+        recap_cache, _ = _get_caches()
+        recap_cache.invalidate(user_id)
+        return _load_latest_recap(supabase, user_id), 200
+    
+    if not stored_recap.data:
+        return {"error": "Failed to store recap"}, 500
+    
+    # The cached "latest recap" is now out of date
+    recap_cache, _ = _get_caches()
+    recap_cache.invalidate(user_id)
+    
+    return {
+        "recap": {
+            "id": stored_recap.data[0]['id'],
+            "headline": recap_data['headline'],
+            "narrative": recap_data['narrative'],
+            "top_emotions": recap_data['top_emotions'],
+            "key_topics": recap_data['key_topics'],
+            "recommendations": recap_data['recommendations'],
+            "created_at": stored_recap.data[0]['created_at']
+        }
+    }, 201
+
+@bp.route('/recap/generate', methods=['POST'])
+@require_auth
+def generate_recap():
+    """
+    POST /insights/recap/generate
+    Generate a new 3-day emotional recap for the user.
+    """
+    try:
+        user = getattr(request, 'current_user', None)
+        if not user:
+            return json_error("Unauthorized", 401)
         
-        if not stored_recap.data:
-            return jsonify({"error": "Failed to store recap"}), 500
+        user_id = user.get('id')
+        supabase = current_app.supabase
         
-        return jsonify({
-            "recap": {
-                "id": stored_recap.data[0]['id'],
-                "headline": recap_data['headline'],
-                "narrative": recap_data['narrative'],
-                "top_emotions": recap_data['top_emotions'],
-                "key_topics": recap_data['key_topics'],
-                "recommendations": recap_data['recommendations'],
-                "created_at": stored_recap.data[0]['created_at']
-            }
-        }), 201
+        try:
+            payload, status = _recap_generation.do(user_id, lambda: _create_recap(supabase, user_id))
+        except FuturesTimeoutError:
+            # Only a waiting request times out; the first one is still generating and will store the recap
+            return jsonify({"status": "pending", "message": "Recap generation is already in progress"}), 202
+        return jsonify(payload), status
         
     except Exception as e:
         logger.error(f"POST /insights/recap/generate error: {e}", exc_info=True)
@@ -129,27 +239,19 @@ def get_memory_graph():
     try:
         user = getattr(request, 'current_user', None)
         if not user:
-            return jsonify({"error": "Unauthorized"}), 401
+            return json_error("Unauthorized", 401)
         
         user_id = user.get('id')
         supabase = current_app.supabase
-        emotion_service = get_emotion_service()
-        
-        # Fetch all user messages (limit to last 1000 for performance)
-        result = supabase.table('messages').select('*').eq(
-            'user_id', user_id
-        ).order('created_at', desc=True).limit(1000).execute()
+        _, memory_graph_cache = _get_caches()
         
-        if not result.data:
-            return jsonify({"memories": []}), 200
-            
-        # Generate memory graph
-        # Reverse to chronological order for analysis
-        messages = result.data[::-1]
-        memory_data = emotion_service.get_memory_graph(messages, user_id)
+        cache_manager = current_app.chat_service.cache_manager
         
-        return jsonify(memory_data), 200
+        memory_data = memory_graph_cache.get_or_compute(
+            user_id, lambda: _load_memory_graph(supabase, cache_manager, user_id)
+        )
+        return _private_cacheable(memory_data), 200
         
     except Exception as e:
         logger.error(f"GET /insights/memory-graph error: {e}", exc_info=True)
-        return jsonify({"error": "Failed to get memory graph"}), 500
+        return json_error("Failed to get memory graph", 500)
@@ -1,7 +1,10 @@
 # app/web/journal_entries.py
 import logging
 from flask import Blueprint, request, jsonify, current_app
+from .. import pg_pool
 from ..security import require_auth
+from .validation import parse_pagination
+from .errors import json_error
 
 bp = Blueprint('journal_entries', __name__)
 logger = logging.getLogger(__name__)
@@ -9,47 +12,23 @@ logger = logging.getLogger(__name__)
 @bp.route('/journal_entries', methods=['GET'])
 @require_auth
 def get_journal_entries():
-    """ GET /journal_entries - Retrieves combined memories and mood logs sorted by timestamp. """
+    """ GET /journal_entries?limit=&offset= - Retrieves a page of combined memories and mood logs sorted by timestamp. """
     try:
         user_id = request.current_user['id']
-        supabase = current_app.supabase
+        limit, offset = parse_pagination()
         
-        # Get memories
-        memories_result = supabase.table('memories').select('*').eq('user_id', user_id).execute()
-        memories = memories_result.data if memories_result.data else []
-        
-        # Get mood logs
-        mood_result = supabase.table('mood_logs').select('*').eq('user_id', user_id).execute()
-        mood_history = mood_result.data if mood_result.data else []
-
-        # Create combined journal entries
-        journal_entries = []
-
-        # Process memories
-        for memory in memories:
-            journal_entries.append({
-                'id': memory['id'],
-                'type': 'memory',
-                'key': memory['key'],
-                'value': memory['value'],
-                'timestamp': memory['timestamp'],
-                'importance': memory.get('importance', 0.5)
-            })
-
-        # Process mood logs
-        for mood in mood_history:
-            journal_entries.append({
-                'id': f"mood_{mood['id']}",
-                'type': 'mood',
-                'score': mood['score'],
-                'label': mood.get('label', 'Neutral'),
-                'topic': mood.get('topic'),
-                'timestamp': mood['timestamp'],
-                'count': 1
-            })
-
-        # Sort all entries by timestamp (descending - newest first)
-        journal_entries.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Postgres merges memories and mood logs and returns them newest first
+        if current_app.pg is not None:
+            journal_entries = pg_pool.fetch_json(
+                current_app.pg, "SELECT public.get_journal_entries(%s, %s, %s)", (user_id, limit, offset)
+            ) or []
+        else:
+            result = current_app.supabase.rpc('get_journal_entries', {
+                'p_user_id': user_id,
+                'p_limit': limit,
+                'p_offset': offset
+            }).execute()
+            journal_entries = result.data or []
 
         return jsonify({
             'entries': journal_entries
@@ -57,4 +36,4 @@ def get_journal_entries():
 
     except Exception as e:
         logger.error(f"GET /journal_entries - 500 Internal Server Error: {e}", exc_info=True)
-        return jsonify({"error": "Failed to fetch journal entries"}), 500
+        return json_error("Failed to fetch journal entries", 500)
@@ -1,22 +1,37 @@
 # app/web/journals.py
 import logging
 from flask import Blueprint, request, jsonify, current_app
-from datetime import datetime
+from datetime import datetime, timezone
+from .. import pg_pool
 from ..security import require_auth
-from .validation import validate_json_request
+from .validation import validate_json_request, parse_pagination
 
 bp = Blueprint('journals', __name__, url_prefix='/journals')
 logger = logging.getLogger(__name__)
 
+_JOURNALS_PAGE_SQL = """
+    SELECT COALESCE(jsonb_agg(j ORDER BY j.created_at DESC), '[]'::jsonb)
+    FROM (
+        SELECT * FROM public.journals
+        WHERE user_id = %s
+        ORDER BY created_at DESC
+        LIMIT %s OFFSET %s
+    ) j
+"""
+
 @bp.route('/', methods=['GET'])
 @require_auth
 def get_journals():
-    """GET /journals - List all journals for current user"""
+    """GET /journals?limit=&offset= - List journals for current user, newest first"""
     try:
         user_id = request.current_user['id']
-        supabase = current_app.supabase
+        limit, offset = parse_pagination()
         
-        result = supabase.table('journals').select('*').eq('user_id', user_id).order('created_at', desc=True).execute()
+        if current_app.pg is not None:
+            return jsonify(pg_pool.fetch_json(current_app.pg, _JOURNALS_PAGE_SQL, (user_id, limit, offset))), 200
+        
+        supabase = current_app.supabase
+        result = supabase.table('journals').select('*').eq('user_id', user_id).order('created_at', desc=True).range(offset, offset + limit - 1).execute()
         return jsonify(result.data), 200
     except Exception as e:
         logger.error(f"Error fetching journals: {e}", exc_info=True)
@@ -31,14 +46,15 @@ def create_journal():
         data, error, status = validate_json_request()
         if error: return error, status
         
+        now = datetime.now(timezone.utc).isoformat()
         payload = {
             'user_id': user_id,
             'title': data.get('title', 'Untitled'),
             'content': data.get('content', ''),
             'mood_score': data.get('mood_score'),
             'tags': data.get('tags', []),
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
+            'created_at': now,
+            'updated_at': now
         }
         
         supabase = current_app.supabase
@@ -65,7 +81,7 @@ def update_journal(journal_id):
             'content': data.get('content'),
             'mood_score': data.get('mood_score'),
             'tags': data.get('tags'),
-            'updated_at': datetime.utcnow().isoformat()
+            'updated_at': datetime.now(timezone.utc).isoformat()
         }
         # Remove None values
         payload = {k: v for k, v in payload.items() if v is not None}
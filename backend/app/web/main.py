@@ -1,8 +1,15 @@
 # app/web/main.py
 import os
+import json
+import time
+import queue
+import atexit
+import threading
 import logging
 import hashlib
 import httpx
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from flask import (
     Blueprint, 
@@ -17,9 +24,15 @@ from flask import (
 )
 
 # Use relative imports
-from ..security import csrf_protect, require_auth, secure_log_message, generate_csrf_token, get_current_user_id
-from ..config import DEFAULT_USER_ID, SUPABASE_URL, SUPABASE_SERVICE_KEY
-from .validation import validate_json_request, validate_message
+from ..security import csrf_protect, require_auth, secure_log_message, generate_csrf_token
+from .. import pg_pool
+from ..config import (
+    DEFAULT_USER_ID, SUPABASE_URL, SUPABASE_SERVICE_KEY, ASYNC_CHAT_WRITES, PRIVATE_CACHE_CONTROL,
+    BULK_RECORDER_SIZE, BULK_RECORDER_FLUSH_TIMEOUT_MS, BULK_RECORDER_QUEUE_SIZE, DAILY_TOKEN_LIMIT
+)
+from .validation import validate_json_request, validate_message, parse_pagination, parse_timestamp_cursor
+from .errors import json_error
+from ..json_provider import dumps_bytes
 
 # Import services
 # from ..services.whisper_utils import transcribe_audio # Keep this commented out
@@ -27,36 +40,85 @@ from .validation import validate_json_request, validate_message
 bp = Blueprint('main', __name__)
 logger = logging.getLogger(__name__)
 
+# Best-effort writes (e.g. recap viewed flags) run here so requests can respond before they finish
+write_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="background-write")
+
+# Chat turns are queued and stored in batches by one recorder thread, so /chat responds before they are written
+_chat_turn_queue = queue.Queue(maxsize=BULK_RECORDER_QUEUE_SIZE)
+_chat_turn_recorder = None
+# Set by stop_chat_turn_recorder; from then on /chat stores its turn inline
+_chat_turn_stop = threading.Event()
+_CHAT_TURN_STOP = object()  # Queued by stop_chat_turn_recorder to wake the recorder
+
+# /chat/stream coalesces tokens into one SSE frame per STREAM_FLUSH_TOKENS tokens or STREAM_FLUSH_SECONDS
+STREAM_FLUSH_TOKENS = 8
+STREAM_FLUSH_SECONDS = 0.02
+_SSE_DONE = b"data: [DONE]\n\n"
+
+def _sse_token_frame(text: str) -> bytes:
+    """Builds a `data: {"token": ...}` SSE frame without an intermediate dict."""
+    return b'data: {"token":' + dumps_bytes(text) + b'}\n\n'
+
+# Columns returned by GET /chat/history
+CHAT_HISTORY_FIELDS = 'id, role, content, created_at'
+
+# One page of messages (newest first), aggregated oldest first
+_CHAT_HISTORY_SQL = f"""
+    SELECT COALESCE(jsonb_agg(m ORDER BY m.created_at), '[]'::jsonb)
+    FROM (
+        SELECT {CHAT_HISTORY_FIELDS} FROM public.messages
+        WHERE user_id = %s
+        ORDER BY created_at DESC
+        LIMIT %s OFFSET %s
+    ) m
+"""
+
+# Keyset variant: seeks on idx_messages_user_created, so older pages cost the same as the first
+_CHAT_HISTORY_BEFORE_SQL = f"""
+    SELECT COALESCE(jsonb_agg(m ORDER BY m.created_at), '[]'::jsonb)
+    FROM (
+        SELECT {CHAT_HISTORY_FIELDS} FROM public.messages
+        WHERE user_id = %s AND created_at < %s
+        ORDER BY created_at DESC
+        LIMIT %s
+    ) m
+"""
+
+# One keep-alive HTTP/2 client for manual RPC calls, so each call reuses a warm TLS connection.
+# The service-role headers never change, so they are set on the client once rather than per call.
+_rpc_http = httpx.Client(
+    base_url=f"{SUPABASE_URL}/rest/v1/rpc",
+    headers={
+        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+        "apikey": SUPABASE_SERVICE_KEY,
+        "Content-Type": "application/json",
+        "Prefer": "return=representation"
+    },
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+) if SUPABASE_SERVICE_KEY else None
+
 # Helper function for manual RPC calls with explicit headers
 def call_supabase_rpc(function_name: str, params: dict) -> dict:
     """
     Call Supabase RPC function with explicit headers.
     The Supabase Python client may not send both required headers for RPC calls.
     """
-    if not SUPABASE_SERVICE_KEY:
+    if _rpc_http is None:
         logger.error("❌ SUPABASE_SERVICE_KEY not set, cannot call RPC")
         raise Exception("SUPABASE_SERVICE_KEY not configured")
     
-    url = f"{SUPABASE_URL}/rest/v1/rpc/{function_name}"
-    
-    headers = {
-        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
-        "apikey": SUPABASE_SERVICE_KEY,
-        "Content-Type": "application/json",
-        "Prefer": "return=representation"
-    }
-    
-    # Log header presence (masked)
-    logger.info("🔑 RPC Call: %s", function_name)
-    logger.info("   Headers present: Authorization=%s, apikey=%s", 
-                "Authorization" in headers, "apikey" in headers)
-    logger.info("   Using key: starts=%s...%s", 
-                SUPABASE_SERVICE_KEY[:12] if len(SUPABASE_SERVICE_KEY) >= 12 else "SHORT",
-                SUPABASE_SERVICE_KEY[-8:])
+    logger.debug("🔑 RPC Call: %s", function_name)
     
     try:
-        response = httpx.post(url, json=params, headers=headers, timeout=10.0)
-        logger.info("   RPC Response: status=%s", response.status_code)
+        try:
+            response = _rpc_http.post(f"/{function_name}", json=params)
+        except (httpx.ConnectError, httpx.ConnectTimeout) as connect_error:
+            # The request never reached PostgREST, so one retry cannot double-write
+            logger.warning("   RPC connect failed (%s); retrying once", connect_error)
+            response = _rpc_http.post(f"/{function_name}", json=params)
+        logger.debug("   RPC Response: status=%s", response.status_code)
         
         if response.status_code not in [200, 201]:
             logger.error("   RPC Error: %s", response.text)
@@ -67,12 +129,135 @@ def call_supabase_rpc(function_name: str, params: dict) -> dict:
         logger.error("   RPC Exception: %s", str(e))
         raise
 
-# Cache for rendered templates
-_template_cache = {}
-def get_template_hash(template_name, **kwargs):
-    """Generate hash for template cache key."""
-    cache_key = f"{template_name}:{str(sorted(kwargs.items()))}"
-    return hashlib.md5(cache_key.encode()).hexdigest()
+# Short acknowledgements carry no emotional signal worth an analysis call
+_MIN_ANALYZABLE_LENGTH = 8
+_TRIVIAL_MESSAGES = frozenset({
+    "hi", "hello", "hey", "yo", "sup", "ok", "okay", "thanks", "thank you", "good morning", "good night", "bye"
+})
+
+def _is_analyzable(message: str) -> bool:
+    """False for messages too short or generic for emotion analysis to say anything."""
+    normalized = message.strip().lower().rstrip('!.?')
+    return len(normalized) >= _MIN_ANALYZABLE_LENGTH and normalized not in _TRIVIAL_MESSAGES
+
+# Read once at import, like security.csrf_protect
+_CSRF_ENABLED = os.getenv('ENABLE_CSRF', 'false').lower() == 'true'
+
+# index.html is rendered once with a placeholder that each request swaps for its CSRF token
+_CSRF_PLACEHOLDER = b'__CSRF_TOKEN__'
+
+@lru_cache(maxsize=1)
+def _render_index():
+    """Renders index.html (shared by all users) and derives its ETag from the rendered body."""
+    rendered = render_template('index.html', csrf_token=_CSRF_PLACEHOLDER.decode()).encode()
+    return rendered, hashlib.blake2b(rendered, digest_size=16).hexdigest()
+
+def _chat_turn_params(current_user_id, user_message, reply, emotion_data):
+    """Builds add_message_pair parameters for one chat turn."""
+    # No conversation id: add_message_pair resolves the latest conversation (or creates one)
+    # In a real app, you might pass conversation_id from frontend
+    return {
+        'p_conversation_id': None,
+        'p_user_content': user_message,
+        'p_assistant_content': reply,
+        'p_user_id': str(current_user_id),  # Provide user_id for service role
+        'p_emotions': emotion_data.get('emotions') if emotion_data else None,
+        'p_topics': emotion_data.get('topics') if emotion_data else None,
+        'p_sentiment_score': emotion_data.get('sentiment_score') if emotion_data else None
+    }
+
+def _persist_chat_turn(params):
+    """Stores USER + ASSISTANT messages in one transaction (finds or creates the conversation)."""
+    try:
+        message_pair_result = call_supabase_rpc('add_message_pair', params)
+        logger.debug("✅ Message pair stored successfully: %s", message_pair_result)
+    except Exception as rpc_error:
+        logger.error(f"❌ RPC add_message_pair failed: {rpc_error}")
+
+def _rpc_wrote_nothing(error) -> bool:
+    """True when a failed RPC provably did not commit, so replaying its rows cannot write them twice."""
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    # PostgREST reported the error itself, so the function's transaction rolled back;
+    # a read timeout or gateway 502/504 may arrive after the batch was committed
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code not in (502, 504)
+
+def _flush_chat_turns(batch):
+    """Stores queued chat turns with one add_message_pairs call, falling back to one call per turn."""
+    try:
+        call_supabase_rpc('add_message_pairs', {'p_pairs': batch})
+        logger.debug("✅ Stored %d message pairs", len(batch))
+    except Exception as e:
+        # Chat turns carry no idempotency key, so only replay when the batch cannot have been stored
+        if not _rpc_wrote_nothing(e):
+            logger.error(f"Bulk add_message_pairs outcome unknown ({e}); not replaying {len(batch)} turns")
+            return
+        logger.warning(f"Bulk add_message_pairs failed ({e}); storing {len(batch)} turns individually")
+        for params in batch:
+            _persist_chat_turn(params)
+
+def _record_chat_turns():
+    """Drains the chat turn queue: flushes every BULK_RECORDER_SIZE turns or BULK_RECORDER_FLUSH_TIMEOUT_MS."""
+    stopping = False
+    while not stopping:
+        turn = _chat_turn_queue.get()
+        if turn is _CHAT_TURN_STOP:
+            break
+        batch = [turn]
+        deadline = time.monotonic() + BULK_RECORDER_FLUSH_TIMEOUT_MS / 1000
+        while len(batch) < BULK_RECORDER_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                turn = _chat_turn_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if turn is _CHAT_TURN_STOP:
+                stopping = True
+                break
+            batch.append(turn)
+        try:
+            _flush_chat_turns(batch)
+        except Exception as e:
+            logger.error(f"Failed to store chat turns: {e}")
+
+def start_chat_turn_recorder():
+    """Starts the background thread that persists queued chat turns (once per process)."""
+    global _chat_turn_recorder
+    if _chat_turn_recorder is None:
+        _chat_turn_recorder = threading.Thread(target=_record_chat_turns, daemon=True, name="ChatTurnRecorder")
+        _chat_turn_recorder.start()
+        atexit.register(stop_chat_turn_recorder)
+
+def stop_chat_turn_recorder(timeout: float = 10):
+    """
+    Stores every queued chat turn before the process exits; safe to call more than once.
+    Runs from gunicorn's worker_exit hook (gunicorn.conf.py) and atexit, since /chat already answered for these turns.
+    """
+    _chat_turn_stop.set()
+    recorder = _chat_turn_recorder
+    if recorder is not None and recorder.is_alive():
+        try:
+            _chat_turn_queue.put(_CHAT_TURN_STOP, timeout=timeout)
+            recorder.join(timeout)
+        except queue.Full:
+            logger.warning("Chat turn recorder did not drain the queue; flushing the rest here")
+
+    # Whatever the recorder did not reach (all of it, if it never started)
+    remaining = []
+    while True:
+        try:
+            turn = _chat_turn_queue.get_nowait()
+        except queue.Empty:
+            break
+        if turn is not _CHAT_TURN_STOP:
+            remaining.append(turn)
+    for start in range(0, len(remaining), BULK_RECORDER_SIZE):
+        try:
+            _flush_chat_turns(remaining[start:start + BULK_RECORDER_SIZE])
+        except Exception as e:
+            logger.error(f"Failed to store chat turns: {e}")
 
 @bp.route('/transcribe', methods=['POST'])
 def transcribe():
@@ -84,63 +269,92 @@ def transcribe():
 def home():
     """Serves the main index.html chat UI with caching."""
     try:
-        csrf_token = generate_csrf_token() if os.getenv('ENABLE_CSRF', 'false').lower() == 'true' else None
+        csrf_token = generate_csrf_token() if _CSRF_ENABLED else None
         
         debug_mode = current_app.config.get('FLASK_DEBUG', False)
-        cache_key = get_template_hash('index.html', csrf_token=csrf_token)
+        render = _render_index.__wrapped__ if debug_mode else _render_index
+        rendered, etag = render()
         
-        if not debug_mode and cache_key in _template_cache:
-            response = make_response(_template_cache[cache_key])
+        if csrf_token and _CSRF_PLACEHOLDER in rendered:
+            rendered = rendered.replace(_CSRF_PLACEHOLDER, csrf_token.encode())
+            etag = f"{etag}-{csrf_token[:16]}"
+        
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
         else:
-            rendered = render_template('index.html', csrf_token=csrf_token)
-            if not debug_mode:
-                _template_cache[cache_key] = rendered
             response = make_response(rendered)
         
         response.headers['Cache-Control'] = 'public, max-age=3600'
-        response.headers['ETag'] = f'"{cache_key}"'
-        return response, 200
+        response.set_etag(etag)
+        return response
     except Exception as e:
         logger.error(f"Error rendering index.html: {e}", exc_info=True)
         return "Template not found.", 404
 
 @bp.route('/static/<path:path>')
 def send_static(path):
-    """Serves static files."""
+    """Serves static files (only reached when WhiteNoise is not installed)."""
     try:
         return send_from_directory(current_app.static_folder, path)
     except Exception:
         logger.warning(f"Static file not found: {path}")
-        return jsonify({"error": "File not found"}), 404
+        return json_error("File not found", 404)
 
 @bp.route('/chat/history', methods=['GET'])
 @require_auth
 def get_chat_history():
     """
-    GET /chat/history
-    Retrieves chat history for the authenticated user.
+    GET /chat/history?limit=&offset= or ?limit=&before=<created_at>
+    Retrieves one page of chat history for the authenticated user (oldest first within the page).
+    Pass the returned next_before as ?before= to page further back without an OFFSET scan.
     """
     try:
         # Get current user ID from request context (set by @require_auth)
         current_user_id = request.current_user['id']
         
-        limit = request.args.get('limit', 50, type=int)
-        
-        logger.info(f"Fetching chat history for user: {current_user_id}, limit: {limit}")
+        limit, offset = parse_pagination()
+        before, error_msg = parse_timestamp_cursor('before')
+        if error_msg:
+            return json_error(error_msg, 400)
+        if before is not None:
+            offset = 0
         
-        # Fetch messages from Supabase
-        result = current_app.supabase.table('messages').select('*').eq(
-            'user_id', current_user_id
-        ).order('created_at', desc=True).limit(limit).execute()
+        logger.debug("Fetching chat history for user: %s, limit: %s", current_user_id, limit)
         
-        messages = result.data if result.data else []
+        if current_app.pg is not None:
+            # Pooled connection, already in chronological order
+            if before is not None:
+                messages = pg_pool.fetch_json(current_app.pg, _CHAT_HISTORY_BEFORE_SQL, (current_user_id, before, limit))
+            else:
+                messages = pg_pool.fetch_json(current_app.pg, _CHAT_HISTORY_SQL, (current_user_id, limit, offset))
+        else:
+            # Fetch messages from Supabase
+            query = current_app.supabase.table('messages').select(CHAT_HISTORY_FIELDS).eq('user_id', current_user_id)
+            if before is not None:
+                query = query.lt('created_at', before)
+            result = query.order('created_at', desc=True).range(offset, offset + limit - 1).execute()
+            
+            messages = result.data if result.data else []
+            
+            # Reverse to chronological order (oldest first) for the frontend
+            messages.reverse()
         
-        logger.info(f"Found {len(messages)} messages for user {current_user_id}")
+        logger.debug("Found %d messages for user %s", len(messages), current_user_id)
         
-        # Reverse to chronological order (oldest first) for the frontend
-        messages.reverse()
+        # History only grows, so the newest timestamp plus the page shape identifies it
+        newest = messages[-1]['created_at'] if messages else ''
+        etag = hashlib.blake2b(f"{limit}:{offset}:{before}:{len(messages)}:{newest}".encode(), digest_size=8).hexdigest()
         
-        return jsonify({"messages": messages}), 200
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            # A short page means there is nothing older to fetch
+            next_before = messages[0]['created_at'] if len(messages) == limit else None
+            response = jsonify({"messages": messages, "next_before": next_before})
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+        response.headers['Vary'] = 'Authorization'
+        return response
     except Exception as e:
         logger.error(f"GET /chat/history - Error: {e}", exc_info=True)
         return jsonify({"error": "Failed to fetch chat history", "details": str(e)}), 500
@@ -157,7 +371,7 @@ def chat():
         if error_response: return error_response, status_code
 
         if 'message' not in data:
-            return jsonify({"error": "Missing required field: 'message'"}), 400
+            return json_error("Missing required field: 'message'", 400)
 
         user_message = data['message']
         is_valid, error_msg = validate_message(user_message, max_length=5000)
@@ -170,127 +384,34 @@ def chat():
         current_user_id = request.current_user['id']
         current_app.chat_service.set_user_context(current_user_id)
 
-        # Use the injected chat_service
-        reply = current_app.chat_service.generate_reply(user_message)
-
-        # Analyze emotions in the user's message
-        emotion_data = None
-        try:
-            from ..services.emotion_analysis_service import get_emotion_service
-            emotion_service = get_emotion_service()
-            
-            # Get recent message context for better analysis
-            recent_messages = []
+        # Analyze emotions in the user's message (skipped for greetings and one-word acks)
+        emotion_service = current_app.emotion_service
+        def analyze(recent_messages):
             try:
-                result = current_app.supabase.table('messages').select('role, content').eq(
-                    'user_id', current_user_id
-                ).order('created_at', desc=True).limit(5).execute()
-                recent_messages = result.data if result.data else []
+                return emotion_service.analyze_message(user_message, recent_messages)
             except Exception as e:
-                logger.warning(f"Failed to get message context: {e}")
-            
-            # Analyze the message
-            emotion_data = emotion_service.analyze_message(user_message, recent_messages)
-            
-            # Store the message with emotion data in database
-            try:
-                # 1. Get or create a conversation for today (simple logic for now)
-                # In a real app, you might pass conversation_id from frontend
-                conversation_id = None
-                
-                # Try to find recent conversation
-                try:
-                    recent_conv = current_app.supabase.table('conversations').select('id').eq('user_id', current_user_id).order('updated_at', desc=True).limit(1).execute()
-                    if recent_conv.data:
-                        conversation_id = recent_conv.data[0]['id']
-                except Exception:
-                    pass
-                
-                # Create new if none found
-                if not conversation_id:
-                    try:
-                        new_conv = current_app.supabase.rpc('create_conversation', {'p_title': 'New Conversation'}).execute()
-                        conversation_id = new_conv.data
-                    except Exception as e:
-                        logger.error(f"Failed to create conversation: {e}")
-
-                if conversation_id:
-                    # DEBUG: Comprehensive key verification
-                    import os
-                    from ..config import SUPABASE_SERVICE_KEY
-                    
-                    # Check both possible env var names
-                    key_from_service_key = os.environ.get("SUPABASE_SERVICE_KEY")
-                    key_from_service_role_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-                    
-                    logger.info("=" * 60)
-                    logger.info("🔍 SUPABASE KEY VERIFICATION")
-                    logger.info("SUPABASE_SERVICE_KEY env var present: %s", bool(key_from_service_key))
-                    logger.info("SUPABASE_SERVICE_ROLE_KEY env var present: %s", bool(key_from_service_role_key))
-                    
-                    # Determine which key is actually being used
-                    actual_key = SUPABASE_SERVICE_KEY
-                    if actual_key:
-                        logger.info("✅ Key loaded in config: YES")
-                        logger.info("   Key starts with: %s", actual_key[:12] if len(actual_key) >= 12 else actual_key)
-                        logger.info("   Key ends with: ...%s", actual_key[-8:])
-                        
-                        # Verify it's the SERVICE ROLE key (not anon/publishable)
-                        if actual_key.startswith("eyJ"):
-                            logger.info("   ✅ Key format: JWT (service_role or anon)")
-                            logger.info("   ⚠️  Cannot distinguish service_role from anon by prefix alone")
-                        elif actual_key.startswith("sb_secret_"):
-                            logger.info("   ✅ Key format: SECRET (service_role)")
-                        elif actual_key.startswith("sb_publishable_"):
-                            logger.error("   ❌ Key format: PUBLISHABLE (wrong key!)")
-                        else:
-                            logger.warning("   ⚠️  Key format: UNKNOWN")
-                    else:
-                        logger.error("❌ Key loaded in config: NO")
-                    
-                    logger.info("=" * 60)
-                    
-                    # 2. Store USER message using manual RPC with explicit headers
-                    try:
-                        logger.info(f"Calling add_message RPC for user message (conversation_id={conversation_id})")
-                        
-                        user_message_result = call_supabase_rpc('add_message', {
-                            'p_conversation_id': str(conversation_id),
-                            'p_role': 'user',
-                            'p_content': user_message,
-                            'p_user_id': str(current_user_id),  # NEW: Provide user_id for service role
-                            'p_emotions': emotion_data.get('emotions') if emotion_data else None,
-                            'p_topics': emotion_data.get('topics') if emotion_data else None,
-                            'p_sentiment_score': emotion_data.get('sentiment_score') if emotion_data else None
-                        })
-                        
-                        logger.info("✅ User message stored successfully: %s", user_message_result)
-                    except Exception as rpc_error:
-                        logger.error(f"❌ RPC add_message failed for user: {rpc_error}")
-                    
-                    # 3. Store ASSISTANT message using manual RPC with explicit headers
-                    try:
-                        logger.info(f"Calling add_message RPC for assistant message (conversation_id={conversation_id})")
-                        
-                        assistant_message_result = call_supabase_rpc('add_message', {
-                            'p_conversation_id': str(conversation_id),
-                            'p_role': 'assistant',
-                            'p_content': reply,
-                            'p_user_id': str(current_user_id)  # NEW: Provide user_id for service role
-                        })
-                        
-                        logger.info("✅ Assistant message stored successfully: %s", assistant_message_result)
-                    except Exception as rpc_error:
-                        logger.error(f"❌ RPC add_message failed for assistant: {rpc_error}")
-                else:
-                    logger.warning("Could not store messages: No conversation ID available")
+                logger.error(f"Emotion analysis failed: {e}", exc_info=True)
+                # Continue without emotion data if analysis fails
+                return None
 
-            except Exception as e:
-                logger.error(f"Failed to store messages via RPC: {e}")
-                
-        except Exception as e:
-            logger.error(f"Emotion analysis failed: {e}", exc_info=True)
-            # Continue without emotion data if analysis fails
+        # The analysis runs alongside reply generation, on the recent context generate_reply fetches
+        if _is_analyzable(user_message):
+            reply, emotion_data = current_app.chat_service.generate_reply(user_message, analyze=analyze)
+        else:
+            reply, _ = current_app.chat_service.generate_reply(user_message)
+            emotion_data = None
+
+        # Store the message with emotion data in database (in the background unless disabled)
+        current_app.chat_service.remember_chat_turn(current_user_id, user_message, reply)
+        turn = _chat_turn_params(current_user_id, user_message, reply, emotion_data)
+        if ASYNC_CHAT_WRITES and not _chat_turn_stop.is_set():
+            try:
+                _chat_turn_queue.put_nowait(turn)
+            except queue.Full:
+                logger.warning("Chat turn queue is full; storing this turn inline")
+                _persist_chat_turn(turn)
+        else:
+            _persist_chat_turn(turn)
 
         # Return reply with emotion data
         response_data = {"reply": reply}
@@ -313,9 +434,6 @@ def chat_stream():
     POST /chat/stream
     Sends a message to the bot and streams the reply token by token.
     """
-    from flask import Response
-    import json
-
     # Validate request data before entering generator
     data, error_response, status_code = validate_json_request()
     if error_response:
@@ -340,18 +458,31 @@ def chat_stream():
 
     def generate():
         try:
-            # Stream the response using generate_reply_stream
+            # Stream the response using generate_reply_stream, batching tokens so each frame costs one write
+            buffer = []
+            flush_at = time.monotonic() + STREAM_FLUSH_SECONDS
             for token in chat_service.generate_reply_stream(user_message):
-                yield f"data: {json.dumps({'token': token})}\n\n"
+                buffer.append(token)
+                if len(buffer) >= STREAM_FLUSH_TOKENS or time.monotonic() >= flush_at:
+                    yield _sse_token_frame(''.join(buffer))
+                    buffer.clear()
+                    flush_at = time.monotonic() + STREAM_FLUSH_SECONDS
+
+            if buffer:
+                yield _sse_token_frame(''.join(buffer))
 
             # Signal completion
-            yield f"data: [DONE]\n\n"
+            yield _SSE_DONE
 
         except Exception as e:
             logger.error(f"POST /chat/stream - Streaming error: {e}", exc_info=True)
             yield f"data: {json.dumps({'error': 'Streaming failed'})}\n\n"
 
-    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', direct_passthrough=True)
+    # Stop nginx from re-buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @bp.route('/health', methods=['GET'])
 def health_check():
@@ -366,8 +497,6 @@ def get_token_usage():
         llm_service = current_app.llm_service
         usage = llm_service._get_daily_usage()
         
-        from ..config import DAILY_TOKEN_LIMIT
-        
         return jsonify({
             "tokens_used_today": usage,
             "daily_limit": DAILY_TOKEN_LIMIT,
@@ -1,7 +1,10 @@
 # app/web/memory.py
 import logging
+import hashlib
 from flask import Blueprint, request, jsonify, current_app
 from ..security import require_auth
+from ..config import PRIVATE_CACHE_CONTROL
+from .validation import parse_pagination, parse_timestamp_cursor
 
 bp = Blueprint('memory', __name__)
 logger = logging.getLogger(__name__)
@@ -9,7 +12,8 @@ logger = logging.getLogger(__name__)
 @bp.route('/memories', methods=['GET', 'POST'])
 @require_auth
 def handle_memories():
-    """GET: Retrieve memories for the authenticated user.
+    """GET: Retrieve one page of memories for the authenticated user, newest first
+    (?limit=&offset=, or ?before=<created_at> using the returned next_before).
     POST: Create a new memory entry for the authenticated user.
     """
     user = getattr(request, 'current_user', None)
@@ -19,12 +23,31 @@ def handle_memories():
     supabase = current_app.supabase
     try:
         if request.method == 'GET':
-            # Fetch memories for this user
-            result = supabase.table('memories').select('*').eq('user_id', user_id).execute()
-            if result.error:
-                logger.error(f"Supabase GET memories error: {result.error}")
-                return jsonify({"error": "Database error", "message": str(result.error)}), 500
-            return jsonify({"status": "success", "memories": result.data}), 200
+            limit, offset = parse_pagination()
+            before, error_msg = parse_timestamp_cursor('before')
+            if error_msg:
+                return jsonify({"error": "Invalid query", "message": error_msg}), 400
+            # Fetch one page of memories for this user (seeks on idx_memories_user_created)
+            query = supabase.table('memories').select('*').eq('user_id', user_id)
+            if before is not None:
+                query = query.lt('created_at', before)
+                offset = 0
+            result = query.order('created_at', desc=True).range(offset, offset + limit - 1).execute()
+            memories = result.data or []
+            # Memories are edited in place, so the page is identified by each row's id and updated_at
+            fingerprint = hashlib.blake2b(f"{limit}:{offset}:{before}".encode(), digest_size=8)
+            for memory in memories:
+                fingerprint.update(f"|{memory.get('id')}:{memory.get('updated_at')}".encode())
+            etag = fingerprint.hexdigest()
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                next_before = memories[-1]['created_at'] if len(memories) == limit else None
+                response = jsonify({"status": "success", "memories": memories, "next_before": next_before})
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+            response.headers['Vary'] = 'Authorization'
+            return response
         else:  # POST
             data = request.get_json()
             if not data or 'key' not in data or 'value' not in data:
@@ -35,9 +58,6 @@ def handle_memories():
                 "value": data['value']
             }
             result = supabase.table('memories').insert(payload).execute()
-            if result.error:
-                logger.error(f"Supabase INSERT memory error: {result.error}")
-                return jsonify({"error": "Database error", "message": str(result.error)}), 500
             return jsonify({"status": "created", "memory": result.data[0] if result.data else payload}), 201
     except Exception as e:
         logger.exception("Unexpected error in memory endpoint")
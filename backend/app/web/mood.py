@@ -1,15 +1,23 @@
 # app/web/mood.py
 import logging
-import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from flask import Blueprint, jsonify, request, Response, current_app
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 
 from ..security import csrf_protect, require_auth, encrypt_data, decrypt_data
-from .validation import validate_json_request
+from .validation import validate_json_request, validate_mood
+from .errors import mark_stale
+from .export import iter_user_rows
+from ..json_provider import dumps_bytes
+from ..config import PRIVATE_CACHE_CONTROL
 
 bp = Blueprint('mood', __name__)
 logger = logging.getLogger(__name__)
 
+# Export reads for independent tables run side by side, so the wait is the slower table rather than the sum
+export_read_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="export-read")
+
 # === Add missing mood endpoints ===
 @bp.route('/mood', methods=['POST'])
 @require_auth
@@ -20,33 +28,21 @@ def log_mood():
         if error_response:
             return error_response, status_code
 
-        score = data.get('score')
+        is_valid, error_msg = validate_mood(data)
+        if not is_valid:
+            return jsonify({"error": error_msg}), 400
+
+        score = data['score']
         label = data.get('label', 'Neutral')
         topic = data.get('topic', 'General')
-        
-        if score is None:
-            return jsonify({"error": "Missing score"}), 400
 
         # Get current user ID from request context (set by @require_auth)
         user_id = request.current_user['id']
         
-        # Insert into Supabase
-        payload = {
-            'user_id': user_id,
-            'score': float(score),
-            'label': label,
-            'topic': topic,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        
-        result = current_app.supabase.table('mood_logs').insert(payload).execute()
-        
-        if result.data:
-            logger.info(f"Mood logged: {score} for user {user_id}")
-            return jsonify({"success": True, "message": "Mood logged successfully", "entry": result.data[0]}), 201
-        else:
-            logger.error("Supabase insert returned no data")
-            return jsonify({"error": "Failed to save mood"}), 500
+        # Queue for the background recorder, which inserts moods in bulk
+        entry = current_app.chat_service.record_mood(user_id, float(score), label, topic)
+        logger.info(f"Mood queued: {score} for user {user_id}")
+        return jsonify({"success": True, "message": "Mood logged successfully", "entry": entry}), 202
 
     except Exception as e:
         logger.error(f"POST /mood - 500 Internal Server Error: {e}", exc_info=True)
@@ -57,23 +53,30 @@ def log_mood():
 def get_mood_logs():
     """ GET /mood_logs - Retrieves mood history for the graph. """
     try:
-        # Use global Supabase client
-        supabase = current_app.supabase
-        
         # Get current user ID
         user_id = request.current_user['id']
         logger.info(f"Fetching mood logs for user_id: {user_id}")
 
-        # Get mood history from last 30 days (extended for graph)
-        cutoff_date = (datetime.utcnow() - timedelta(days=30)).isoformat()
-        result = supabase.table('mood_logs').select('*').eq('user_id', user_id).gte('timestamp', cutoff_date).order('timestamp', desc=True).execute()
-        history = result.data if result.data else []
+        # Get mood history from last 30 days (extended for graph), cached until the next mood is logged
+        history, stale = current_app.chat_service.get_mood_logs(user_id)
         
         logger.info(f"Found {len(history)} mood entries for user {user_id}")
 
-        return jsonify({
-            "mood_logs": history
-        }), 200
+        # Mood logs are append-only, so the newest row plus the window size identifies the response
+        newest = f"{history[0].get('id')}:{history[0].get('timestamp')}" if history else ''
+        etag = hashlib.blake2b(f"{len(history)}:{newest}".encode(), digest_size=8).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify({
+                "mood_logs": history
+            })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+        response.headers['Vary'] = 'Authorization'
+        if stale:
+            mark_stale(response)
+        return response
     except Exception as e:
         logger.error(f"GET /mood_logs - 500 Internal Server Error: {e}", exc_info=True)
         return jsonify({"mood_logs": []}), 200
@@ -86,29 +89,22 @@ def export_mood_history():
         password = request.args.get('password', None)
         user_id = request.current_user['id']
         
-        def _export_task():
-            supabase = current_app.supabase
-            
-            # Get mood history
-            mood_result = supabase.table('mood_logs').select('*').eq('user_id', user_id).execute()
-            history = mood_result.data if mood_result.data else []
-            
-            # Get memories
-            memories_result = supabase.table('memories').select('*').eq('user_id', user_id).execute()
-            memories = memories_result.data if memories_result.data else []
-            
-            export_data = {
-                "mood_history": history,
-                "memories": memories,
-                "export_timestamp": datetime.utcnow().isoformat()
-            }
-            json_data = json.dumps(export_data, indent=2)
-            encrypted_data = encrypt_data(json_data, password)
-            return encrypted_data
+        supabase = current_app.supabase
+        
+        # Page through both tables: a bare select is cut off at PostgREST's max-rows limit
+        history_future = export_read_executor.submit(lambda: list(iter_user_rows(supabase, 'mood_logs', user_id)))
+        memories = list(iter_user_rows(supabase, 'memories', user_id))
+        history = history_future.result()
         
-        # Use the executor from the chat_service (which gets it from llm_service)
-        future = current_app.chat_service.llm_service.heavy_executor.submit(_export_task)
-        encrypted_data = future.result(timeout=30)
+        export_data = {
+            "mood_history": history,
+            "memories": memories,
+            "export_timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        # Compact bytes straight into the cipher: no indent padding and no str -> bytes copy
+        json_data = dumps_bytes(export_data)
+        # Password key derivation is offloaded to the KDF process pool inside encrypt_data
+        encrypted_data = encrypt_data(json_data, password)
         
         response = Response(
             encrypted_data,
@@ -1,10 +1,13 @@
 # app/web/preferences.py
 import logging
+import hashlib
 from flask import Blueprint, jsonify, request, current_app
 
 # Use relative imports
 from ..security import csrf_protect, require_auth
 from .validation import validate_json_request
+from .errors import mark_stale
+from ..config import PRIVATE_CACHE_CONTROL
 
 bp = Blueprint('preferences', __name__, url_prefix='/preferences')
 
@@ -17,12 +20,10 @@ def get_preferences():
     try:
         user_id = request.current_user['id']
         
-        # Fetch from Supabase
-        result = current_app.supabase.table('user_settings').select('*').eq('user_id', user_id).execute()
+        # Fetch from Supabase (cached per user until the next write)
+        prefs, stale = current_app.chat_service.get_user_settings(user_id)
         
-        if result.data:
-            prefs = result.data[0]
-        else:
+        if not prefs:
             # Return defaults if no settings found
             prefs = {
                 "listening_mode": False,
@@ -30,7 +31,18 @@ def get_preferences():
                 "listening_tts_muted": False
             }
             
-        return jsonify(prefs), 200
+        # Every write bumps updated_at, so it identifies the body without serializing it
+        etag = hashlib.blake2b(f"{user_id}:{prefs.get('updated_at')}".encode(), digest_size=8).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(prefs)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+        response.headers['Vary'] = 'Authorization'
+        if stale:
+            mark_stale(response)
+        return response
     except Exception as e:
         logger.error(f"Get preferences error: {e}", exc_info=True)
         return jsonify({"error": "Failed to get preferences"}), 500
@@ -63,6 +75,7 @@ def toggle_listening_mode():
             
         # Upsert to Supabase
         result = current_app.supabase.table('user_settings').upsert(payload).execute()
+        current_app.chat_service.invalidate_user_settings(user_id)
         
         if result.data:
             logger.info(f"Listening mode {'enabled' if enabled else 'disabled'} for user {user_id}")
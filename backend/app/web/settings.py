@@ -1,9 +1,12 @@
 # app/web/settings.py
 import logging
+import hashlib
 from flask import Blueprint, request, jsonify, current_app
-from datetime import datetime
+from datetime import datetime, timezone
 from ..security import require_auth
 from .validation import validate_json_request
+from .errors import mark_stale
+from ..config import PRIVATE_CACHE_CONTROL
 
 bp = Blueprint('settings', __name__, url_prefix='/user/settings')
 logger = logging.getLogger(__name__)
@@ -14,20 +17,30 @@ def get_settings():
     """GET /user/settings - Get user settings"""
     try:
         user_id = request.current_user['id']
-        supabase = current_app.supabase
-        
-        result = supabase.table('user_settings').select('*').eq('user_id', user_id).execute()
         
-        if result.data:
-            return jsonify(result.data[0]), 200
+        # Cached per user until the next write
+        settings, stale = current_app.chat_service.get_user_settings(user_id)
         
-        # Return defaults if no settings exist
-        return jsonify({
-            'theme': 'light',
-            'notifications_enabled': True,
-            'sound_enabled': True,
-            'haptic_enabled': True
-        }), 200
+        if not settings:
+            # Return defaults if no settings exist
+            settings = {
+                'theme': 'light',
+                'notifications_enabled': True,
+                'sound_enabled': True,
+                'haptic_enabled': True
+            }
+        # Every write bumps updated_at, so it identifies the body without serializing it
+        etag = hashlib.blake2b(f"{user_id}:{settings.get('updated_at')}".encode(), digest_size=8).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(settings)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+        response.headers['Vary'] = 'Authorization'
+        if stale:
+            mark_stale(response)
+        return response
     except Exception as e:
         logger.error(f"Error fetching settings: {e}", exc_info=True)
         return jsonify({"error": "Failed to fetch settings"}), 500
@@ -43,7 +56,7 @@ def update_settings():
         
         payload = {
             'user_id': user_id,
-            'updated_at': datetime.utcnow().isoformat()
+            'updated_at': datetime.now(timezone.utc).isoformat()
         }
         
         # Add optional fields
@@ -56,6 +69,7 @@ def update_settings():
         
         # Upsert settings
         result = supabase.table('user_settings').upsert(payload).execute()
+        current_app.chat_service.invalidate_user_settings(user_id)
         
         if result.data:
             return jsonify(result.data[0]), 200
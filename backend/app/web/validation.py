@@ -1,5 +1,6 @@
 # app/web/validation.py
 import logging
+from datetime import datetime
 from flask import request, jsonify
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,23 @@ def validate_json_request():
         logger.warning(f"JSON parsing error: {e}")
         return None, jsonify({"error": "Malformed JSON"}), 400
 
+def parse_pagination(default_limit=50, max_limit=500):
+    """Reads ?limit=&offset= from the query string, clamped to sane bounds."""
+    limit = request.args.get('limit', default_limit, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    return min(max(limit, 1), max_limit), max(offset, 0)
+
+def parse_timestamp_cursor(name='before'):
+    """Reads an optional ISO-8601 timestamp cursor from the query string. Returns (value, error_msg)."""
+    value = request.args.get(name)
+    if value is None:
+        return None, None
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return None, f"'{name}' must be an ISO-8601 timestamp"
+    return value, None
+
 def validate_message(message, max_length=5000, min_length=1):
     """Validates chat message input."""
     if not isinstance(message, str):
@@ -27,6 +45,21 @@ def validate_message(message, max_length=5000, min_length=1):
         return False, f"Message exceeds maximum length of {max_length} characters"
     return True, None
 
+def validate_mood(data, max_label_length=64, max_topic_length=128):
+    """Validates a mood entry: score is a number in [-1, 1]; label and topic are optional short strings."""
+    score = data.get('score')
+    if score is None:
+        return False, "Missing score"
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        return False, "Score must be a number"
+    if not -1.0 <= score <= 1.0:
+        return False, "Score must be between -1 and 1"
+    for field, max_length in (('label', max_label_length), ('topic', max_topic_length)):
+        value = data.get(field)
+        if value is not None and (not isinstance(value, str) or len(value) > max_length):
+            return False, f"{field.capitalize()} must be a string of at most {max_length} characters"
+    return True, None
+
 def validate_memory_id(mem_id):
     """Validates memory ID input."""
     if not isinstance(mem_id, (int, str)):
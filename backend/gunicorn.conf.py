@@ -0,0 +1,8 @@
+# gunicorn.conf.py
+# Read by gunicorn from the working directory (the Dockerfile CMD runs in /app).
+
+def worker_exit(server, worker):
+    """Stores the chat turns and moods still queued in this worker before it stops (deploys, restarts, max-requests)."""
+    from app.web import main
+    main.stop_chat_turn_recorder()
+    worker.wsgi.chat_service.stop_mood_recorder()
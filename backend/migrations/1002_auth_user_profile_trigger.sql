@@ -0,0 +1,30 @@
+-- Migration: Create public.users profile rows from an auth.users trigger
+-- Replaces the separate users-table insert/upsert the backend issued after
+-- sign-up and Google sign-in, removing one round-trip from both paths.
+
+CREATE OR REPLACE FUNCTION public.handle_new_user()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO public.users (id, full_name)
+    VALUES (
+        NEW.id,
+        COALESCE(NEW.raw_user_meta_data->>'full_name', NEW.raw_user_meta_data->>'name', '')
+    )
+    ON CONFLICT (id) DO NOTHING;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS on_auth_user_created ON auth.users;
+CREATE TRIGGER on_auth_user_created
+AFTER INSERT ON auth.users
+FOR EACH ROW
+EXECUTE FUNCTION public.handle_new_user();
+
+-- Backfill profiles for accounts created before the trigger existed
+INSERT INTO public.users (id, full_name)
+SELECT
+    au.id,
+    COALESCE(au.raw_user_meta_data->>'full_name', au.raw_user_meta_data->>'name', '')
+FROM auth.users au
+ON CONFLICT (id) DO NOTHING;
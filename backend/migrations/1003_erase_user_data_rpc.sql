@@ -0,0 +1,37 @@
+-- Migration: erase_user_data RPC
+-- Deletes all of a user's content in one transaction so /erase-all needs a
+-- single round-trip and either removes everything or nothing.
+
+CREATE OR REPLACE FUNCTION public.erase_user_data(p_user_id UUID)
+RETURNS JSONB AS $$
+DECLARE
+    v_messages INTEGER;
+    v_memories INTEGER;
+    v_mood_logs INTEGER;
+    v_recaps INTEGER;
+BEGIN
+    DELETE FROM public.messages WHERE user_id = p_user_id;
+    GET DIAGNOSTICS v_messages = ROW_COUNT;
+
+    -- memory_embeddings rows cascade from memories
+    DELETE FROM public.memories WHERE user_id = p_user_id;
+    GET DIAGNOSTICS v_memories = ROW_COUNT;
+
+    DELETE FROM public.mood_logs WHERE user_id = p_user_id;
+    GET DIAGNOSTICS v_mood_logs = ROW_COUNT;
+
+    DELETE FROM public.emotional_recaps WHERE user_id = p_user_id;
+    GET DIAGNOSTICS v_recaps = ROW_COUNT;
+
+    RETURN jsonb_build_object(
+        'messages', v_messages,
+        'memories', v_memories,
+        'mood_logs', v_mood_logs,
+        'emotional_recaps', v_recaps
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Only the backend (service role) may erase on behalf of a user id
+REVOKE EXECUTE ON FUNCTION public.erase_user_data(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.erase_user_data(UUID) TO service_role;
@@ -0,0 +1,65 @@
+-- Migration: get_journal_entries RPC
+-- Merges memories and mood logs into one timeline inside Postgres so the API
+-- makes a single call and receives rows already shaped and sorted.
+
+-- The backend reads and writes memories by key/value/timestamp
+ALTER TABLE public.memories
+ADD COLUMN IF NOT EXISTS key TEXT,
+ADD COLUMN IF NOT EXISTS value TEXT,
+ADD COLUMN IF NOT EXISTS timestamp TIMESTAMPTZ DEFAULT NOW();
+
+ALTER TABLE public.mood_logs
+ADD COLUMN IF NOT EXISTS topic TEXT;
+
+-- Let each branch of the UNION read its newest rows straight off an index
+CREATE INDEX IF NOT EXISTS idx_memories_user_timestamp
+ON public.memories(user_id, timestamp DESC);
+
+CREATE INDEX IF NOT EXISTS idx_mood_logs_user_timestamp
+ON public.mood_logs(user_id, timestamp DESC);
+
+CREATE OR REPLACE FUNCTION public.get_journal_entries(
+    p_user_id UUID,
+    p_limit INTEGER DEFAULT NULL  -- NULL returns every entry
+)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_agg(entry ORDER BY ts DESC), '[]'::jsonb)
+    FROM (
+        (
+            SELECT
+                m.timestamp AS ts,
+                jsonb_build_object(
+                    'id', m.id,
+                    'type', 'memory',
+                    'key', m.key,
+                    'value', m.value,
+                    'timestamp', m.timestamp,
+                    'importance', COALESCE(m.importance, 0.5)
+                ) AS entry
+            FROM public.memories m
+            WHERE m.user_id = p_user_id
+            ORDER BY m.timestamp DESC
+            LIMIT p_limit
+        )
+        UNION ALL
+        (
+            SELECT
+                l.timestamp AS ts,
+                jsonb_build_object(
+                    'id', 'mood_' || l.id,
+                    'type', 'mood',
+                    'score', l.score,
+                    'label', COALESCE(l.label, 'Neutral'),
+                    'topic', l.topic,
+                    'timestamp', l.timestamp,
+                    'count', 1
+                ) AS entry
+            FROM public.mood_logs l
+            WHERE l.user_id = p_user_id
+            ORDER BY l.timestamp DESC
+            LIMIT p_limit
+        )
+        ORDER BY ts DESC
+        LIMIT p_limit
+    ) merged;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,53 @@
+-- Migration: Paginate get_journal_entries
+-- Adds an offset so /journal_entries can return one page at a time. Each
+-- branch only needs its newest (offset + limit) rows to fill the page.
+
+DROP FUNCTION IF EXISTS public.get_journal_entries(UUID, INTEGER);
+
+CREATE OR REPLACE FUNCTION public.get_journal_entries(
+    p_user_id UUID,
+    p_limit INTEGER DEFAULT 50,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_agg(entry ORDER BY ts DESC), '[]'::jsonb)
+    FROM (
+        (
+            SELECT
+                m.timestamp AS ts,
+                jsonb_build_object(
+                    'id', m.id,
+                    'type', 'memory',
+                    'key', m.key,
+                    'value', m.value,
+                    'timestamp', m.timestamp,
+                    'importance', COALESCE(m.importance, 0.5)
+                ) AS entry
+            FROM public.memories m
+            WHERE m.user_id = p_user_id
+            ORDER BY m.timestamp DESC
+            LIMIT p_offset + p_limit
+        )
+        UNION ALL
+        (
+            SELECT
+                l.timestamp AS ts,
+                jsonb_build_object(
+                    'id', 'mood_' || l.id,
+                    'type', 'mood',
+                    'score', l.score,
+                    'label', COALESCE(l.label, 'Neutral'),
+                    'topic', l.topic,
+                    'timestamp', l.timestamp,
+                    'count', 1
+                ) AS entry
+            FROM public.mood_logs l
+            WHERE l.user_id = p_user_id
+            ORDER BY l.timestamp DESC
+            LIMIT p_offset + p_limit
+        )
+        ORDER BY ts DESC
+        OFFSET p_offset
+        LIMIT p_limit
+    ) merged;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,15 @@
+-- Migration: One emotional recap per user per day
+-- Backstop for concurrent POST /recap/generate calls that land on different
+-- app workers: a second insert for the same UTC day fails with a unique
+-- violation and the API returns the recap that won.
+
+-- Keep only the newest recap for any user/day that already has duplicates
+DELETE FROM public.emotional_recaps r
+USING public.emotional_recaps newer
+WHERE newer.user_id = r.user_id
+  AND (newer.created_at AT TIME ZONE 'UTC')::date = (r.created_at AT TIME ZONE 'UTC')::date
+  AND (newer.created_at, newer.id) > (r.created_at, r.id);
+
+-- AT TIME ZONE 'UTC' makes the day expression immutable, as an index requires
+CREATE UNIQUE INDEX IF NOT EXISTS idx_emotional_recaps_user_day
+ON public.emotional_recaps(user_id, ((created_at AT TIME ZONE 'UTC')::date));
@@ -0,0 +1,111 @@
+-- Migration: get_or_create_active_conversation RPC
+-- Resolves the user's current conversation (most recently updated) or creates
+-- one, in a single statement. add_message_pair now calls it when no
+-- conversation id is passed, so a chat turn is stored in one round-trip.
+
+CREATE OR REPLACE FUNCTION public.get_or_create_active_conversation(
+    p_user_id UUID DEFAULT NULL,  -- Service role provides user_id
+    p_title TEXT DEFAULT 'New Conversation'
+)
+RETURNS UUID AS $$
+DECLARE
+    v_user_id UUID;
+    v_conversation_id UUID;
+BEGIN
+    -- Get user_id: prefer auth.uid() (user JWT), fall back to p_user_id (service role)
+    v_user_id := COALESCE(auth.uid(), p_user_id);
+
+    IF v_user_id IS NULL THEN
+        RAISE EXCEPTION 'Not authenticated';
+    END IF;
+
+    -- Serialize per user so two first messages cannot each create a conversation
+    PERFORM pg_advisory_xact_lock(hashtext(v_user_id::text));
+
+    WITH existing AS (
+        SELECT id FROM conversations
+        WHERE user_id = v_user_id
+        ORDER BY updated_at DESC
+        LIMIT 1
+    ), created AS (
+        INSERT INTO conversations (user_id, title)
+        SELECT v_user_id, p_title
+        WHERE NOT EXISTS (SELECT 1 FROM existing)
+        RETURNING id
+    )
+    SELECT id INTO v_conversation_id FROM existing
+    UNION ALL
+    SELECT id FROM created;
+
+    RETURN v_conversation_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Falls back to p_user_id when there is no JWT, so only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION public.get_or_create_active_conversation(UUID, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_or_create_active_conversation(UUID, TEXT) TO service_role;
+
+CREATE OR REPLACE FUNCTION public.add_message_pair(
+    p_conversation_id UUID,
+    p_user_content TEXT,
+    p_assistant_content TEXT,
+    p_emotions JSONB DEFAULT NULL,
+    p_topics TEXT[] DEFAULT NULL,
+    p_sentiment_score FLOAT DEFAULT NULL,
+    p_user_id UUID DEFAULT NULL,  -- Service role provides user_id
+    p_title TEXT DEFAULT 'New Conversation'
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_user_id UUID;
+    v_conversation_id UUID := p_conversation_id;
+    v_user_message_id UUID;
+    v_assistant_message_id UUID;
+BEGIN
+    -- Get user_id: prefer auth.uid() (user JWT), fall back to p_user_id (service role)
+    v_user_id := COALESCE(auth.uid(), p_user_id);
+
+    IF v_user_id IS NULL THEN
+        RAISE EXCEPTION 'Not authenticated';
+    END IF;
+
+    -- A caller-supplied conversation must belong to the user the messages are written for
+    IF p_conversation_id IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM conversations WHERE id = p_conversation_id AND user_id = v_user_id
+    ) THEN
+        RAISE EXCEPTION 'Conversation % does not belong to user', p_conversation_id;
+    END IF;
+
+    IF v_conversation_id IS NULL THEN
+        v_conversation_id := public.get_or_create_active_conversation(v_user_id, p_title);
+    END IF;
+
+    -- clock_timestamp() (not now()) keeps the reply ordered after the user message
+    INSERT INTO messages (
+        conversation_id, user_id, role, content, emotions, topics, sentiment_score, created_at
+    ) VALUES (
+        v_conversation_id, v_user_id, 'user', p_user_content, p_emotions, p_topics, p_sentiment_score, clock_timestamp()
+    ) RETURNING id INTO v_user_message_id;
+
+    INSERT INTO messages (
+        conversation_id, user_id, role, content, created_at
+    ) VALUES (
+        v_conversation_id, v_user_id, 'assistant', p_assistant_content, clock_timestamp()
+    ) RETURNING id INTO v_assistant_message_id;
+
+    UPDATE conversations
+    SET updated_at = NOW()
+    WHERE id = v_conversation_id;
+
+    RETURN jsonb_build_object(
+        'conversation_id', v_conversation_id,
+        'user_message_id', v_user_message_id,
+        'assistant_message_id', v_assistant_message_id
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Trusts p_user_id when there is no JWT, so only the backend (service role) may call it;
+-- add_message_pairs is SECURITY DEFINER and still reaches it
+REVOKE EXECUTE ON FUNCTION public.add_message_pair(UUID, TEXT, TEXT, JSONB, TEXT[], FLOAT, UUID, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.add_message_pair(UUID, TEXT, TEXT, JSONB, TEXT[], FLOAT, UUID, TEXT) TO service_role;
@@ -0,0 +1,34 @@
+-- Migration: add_message_pairs RPC
+-- Stores a batch of chat turns (possibly from different users) in one call.
+-- The backend queues turns and flushes them together, so concurrent chats
+-- share a single round-trip. Each element carries add_message_pair's
+-- parameters; turns are applied in array order.
+
+CREATE OR REPLACE FUNCTION public.add_message_pairs(p_pairs JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    v_pair JSONB;
+    v_results JSONB := '[]'::jsonb;
+BEGIN
+    FOR v_pair IN SELECT value FROM jsonb_array_elements(p_pairs) WITH ORDINALITY ORDER BY ordinality
+    LOOP
+        v_results := v_results || jsonb_build_array(public.add_message_pair(
+            (v_pair->>'p_conversation_id')::UUID,
+            v_pair->>'p_user_content',
+            v_pair->>'p_assistant_content',
+            v_pair->'p_emotions',
+            CASE WHEN jsonb_typeof(v_pair->'p_topics') = 'array'
+                 THEN ARRAY(SELECT jsonb_array_elements_text(v_pair->'p_topics'))
+            END,
+            (v_pair->>'p_sentiment_score')::FLOAT,
+            (v_pair->>'p_user_id')::UUID
+        ));
+    END LOOP;
+
+    RETURN v_results;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Turns carry arbitrary user ids, so only the backend (service role) may call this
+REVOKE EXECUTE ON FUNCTION public.add_message_pairs(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.add_message_pairs(JSONB) TO service_role;
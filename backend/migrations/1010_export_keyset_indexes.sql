@@ -0,0 +1,17 @@
+-- Migration: Keyset indexes for data export
+-- /export-all and /export/mood-history page through each table with
+-- WHERE user_id = $1 AND id > $last ORDER BY id LIMIT n. A (user_id, id)
+-- index turns every page into a single range scan instead of sorting all of
+-- the user's rows again for each page.
+
+CREATE INDEX IF NOT EXISTS idx_messages_user_id_id
+ON public.messages(user_id, id);
+
+CREATE INDEX IF NOT EXISTS idx_memories_user_id_id
+ON public.memories(user_id, id);
+
+CREATE INDEX IF NOT EXISTS idx_mood_logs_user_id_id
+ON public.mood_logs(user_id, id);
+
+CREATE INDEX IF NOT EXISTS idx_emotional_recaps_user_id_id
+ON public.emotional_recaps(user_id, id);
@@ -6,22 +6,30 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-print(f"CWD: {os.getcwd()}")
-print(f"Script: {__file__}")
-print(f"Python path: {sys.path}")
 
-from app import create_app
+def create_app():
+    """
+    App factory for `flask run` (FLASK_APP=run.py).
+    The app package pulls in the whole service stack, so it is only imported when an app is actually built.
+    """
+    from app import create_app as _create_app
+    return _create_app()
 
-# We create the app instance by calling the factory
-app = create_app()
 
 if __name__ == "__main__":
+    print(f"CWD: {os.getcwd()}")
+    print(f"Script: {__file__}")
+    print(f"Python path: {sys.path}")
+
+    # We create the app instance by calling the factory
+    app = create_app()
+
     # Get config from the app's config object
     debug_mode = app.config.get('FLASK_DEBUG', False)
     # Bind to $PORT if set (for Render/Heroku), otherwise default to 5001
     port = int(os.getenv('PORT', app.config.get('FLASK_PORT', 5001)))
-    
+
     app.logger.info(f"--- Starting Warmth Server at http://127.0.0.1:{port} ---")
     app.logger.info(f"Debug mode: {debug_mode}")
-    
+
     app.run(debug=debug_mode, port=port, host='0.0.0.0')
\ No newline at end of file
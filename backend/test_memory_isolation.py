@@ -2,6 +2,7 @@ import sys
 import os
 import logging
 from unittest.mock import MagicMock, patch
+from collections import namedtuple
 from datetime import datetime
 
 # Add backend to path
@@ -15,13 +16,28 @@ with patch.dict(os.environ, {'ZAI_API_KEY': 'test', 'SUPABASE_URL': 'https://tes
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Only .data is read from query results, so a plain tuple stands in for the response
+Result = namedtuple("Result", ["data"])
+
 class MockSupabaseTable:
     def __init__(self, data_store, table_name):
         self.store = data_store
         self.table_name = table_name
         self.query_filters = {}
+        self.pending_insert = None
+        self.pending_update = None
 
     def insert(self, data):
+        # Applied on execute(), like the real query builder
+        self.pending_insert = data
+        return self
+
+    def update(self, data):
+        # Applied to the rows matching the eq() filters on execute()
+        self.pending_update = data
+        return self
+
+    def _do_insert(self, data):
         if self.table_name not in self.store:
             self.store[self.table_name] = []
         
@@ -29,8 +45,8 @@ class MockSupabaseTable:
         if isinstance(data, dict):
             data['id'] = len(self.store[self.table_name]) + 1
             self.store[self.table_name].append(data)
-            return MagicMock(data=[data])
-        return MagicMock(data=[])
+            return Result([data])
+        return Result([])
 
     def select(self, columns):
         return self
@@ -40,9 +56,12 @@ class MockSupabaseTable:
         return self
 
     def execute(self):
+        if self.pending_insert is not None:
+            return self._do_insert(self.pending_insert)
+
         # Filter data based on eq() calls
         if self.table_name not in self.store:
-            return MagicMock(data=[])
+            return Result([])
         
         results = []
         for row in self.store[self.table_name]:
@@ -52,13 +71,11 @@ class MockSupabaseTable:
                     match = False
                     break
             if match:
+                if self.pending_update is not None:
+                    row.update(self.pending_update)
                 results.append(row)
         
-        return MagicMock(data=results)
-    
-    def update(self, data):
-        # Simple mock update - just return success if found
-        return self.execute() # reusing execute to find rows, in reality update modifies them
+        return Result(results)
 
 class MockSupabaseClient:
     def __init__(self):
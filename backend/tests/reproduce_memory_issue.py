@@ -10,6 +10,25 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.services.chat_service import ChatService
 
+# Copy regex from chat_service.py
+MEMORY_RICH_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in [
+    r"i am (\w+)",
+    r"i'm (\w+)",
+    r"my name is (\w+)",
+    r"i work as (?:a |an )?([^,.!?]+)",
+    r"i live (?:in|at) ([^.!?]+)",
+    r"i have (?:a |an )?([^,.!?]+)",
+    r"my (\w+) is ([^.!?]+)",
+    r"i like (?:to )?([^,.!?]+)",
+    r"i don't like (?:to )?([^,.!?]+)",
+    r"i (?:go to|study at) ([^.!?]+)",
+    r"i graduated (?:from )?([^,.!?]+)",
+    r"i was born (?:in|at) ([^.!?]+)",
+    r"i'm from ([^.!?]+)",
+    r"my favorite ([^.!?]+)",
+    r"i'm feeling ([^.!?]+)"
+])
+
 class TestMemoryExtraction(unittest.TestCase):
     def setUp(self):
         self.mock_supabase = MagicMock()
@@ -33,29 +52,10 @@ class TestMemoryExtraction(unittest.TestCase):
         """Test if the user input triggers the memory extraction regex"""
         user_input = "you know my favourite is my pet dog skyee"
         
-        # Copy regex from chat_service.py
-        memory_rich_patterns = [
-            r"i am (\w+)",
-            r"i'm (\w+)",
-            r"my name is (\w+)",
-            r"i work as (?:a |an )?([^,.!?]+)",
-            r"i live (?:in|at) ([^.!?]+)",
-            r"i have (?:a |an )?([^,.!?]+)",
-            r"my (\w+) is ([^.!?]+)",
-            r"i like (?:to )?([^,.!?]+)",
-            r"i don't like (?:to )?([^,.!?]+)",
-            r"i (?:go to|study at) ([^.!?]+)",
-            r"i graduated (?:from )?([^,.!?]+)",
-            r"i was born (?:in|at) ([^.!?]+)",
-            r"i'm from ([^.!?]+)",
-            r"my favorite ([^.!?]+)",
-            r"i'm feeling ([^.!?]+)"
-        ]
-        
         matched = False
-        for pattern in memory_rich_patterns:
-            if re.search(pattern, user_input.lower()):
-                print(f"Matched pattern: {pattern}")
+        for pattern in MEMORY_RICH_PATTERNS:
+            if pattern.search(user_input):
+                print(f"Matched pattern: {pattern.pattern}")
                 matched = True
                 break
         
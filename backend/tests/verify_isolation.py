@@ -5,10 +5,13 @@ import time
 
 BASE_URL = "http://localhost:5001"
 
+# One keep-alive connection to the local server is reused for every call
+session = requests.Session()
+
 def create_dev_user(user_id, display_name):
     """Creates a dev user and returns the token."""
     print(f"Creating dev user: {user_id}...")
-    response = requests.post(f"{BASE_URL}/auth/dev-user", json={
+    response = session.post(f"{BASE_URL}/auth/dev-user", json={
         "user_id": user_id,
         "display_name": display_name
     })
@@ -38,7 +41,7 @@ def test_isolation():
     
     # A. Log Mood
     print("User A logging mood...")
-    requests.post(f"{BASE_URL}/mood", headers=get_headers(token_a), json={
+    session.post(f"{BASE_URL}/mood", headers=get_headers(token_a), json={
         "score": 0.8,
         "label": "happy",
         "topic": "testing"
@@ -46,7 +49,7 @@ def test_isolation():
 
     # B. Send Chat Message
     print("User A sending message...")
-    requests.post(f"{BASE_URL}/chat", headers=get_headers(token_a), json={
+    session.post(f"{BASE_URL}/chat", headers=get_headers(token_a), json={
         "message": "Secret message from User A",
         "user_id": user_a["user_id"]
     })
@@ -59,7 +62,7 @@ def test_isolation():
     
     # A. Check Mood History
     print("User B checking mood history...")
-    mood_resp = requests.get(f"{BASE_URL}/mood-history", headers=get_headers(token_b))
+    mood_resp = session.get(f"{BASE_URL}/mood-history", headers=get_headers(token_b))
     moods = mood_resp.json()
     print(f"User B sees {len(moods)} mood logs.")
     
@@ -71,7 +74,7 @@ def test_isolation():
 
     # B. Check Chat History
     print("User B checking chat history...")
-    chat_resp = requests.get(f"{BASE_URL}/chat/history", headers=get_headers(token_b))
+    chat_resp = session.get(f"{BASE_URL}/chat/history", headers=get_headers(token_b))
     chats = chat_resp.json()
     print(f"User B sees {len(chats)} chat messages.")
     
@@ -84,7 +87,7 @@ def test_isolation():
     # 4. User B creates their own data
     print("\n--- User B Creating Own Data ---")
     print("User B logging mood...")
-    requests.post(f"{BASE_URL}/mood", headers=get_headers(token_b), json={
+    session.post(f"{BASE_URL}/mood", headers=get_headers(token_b), json={
         "score": -0.5,
         "label": "sad",
         "topic": "isolation_test"
@@ -92,7 +95,7 @@ def test_isolation():
     
     # 5. Verify User B sees their own data
     print("\n--- Verifying User B Data ---")
-    mood_resp = requests.get(f"{BASE_URL}/mood-history", headers=get_headers(token_b))
+    mood_resp = session.get(f"{BASE_URL}/mood-history", headers=get_headers(token_b))
     moods = mood_resp.json()
     print(f"User B sees {len(moods)} mood logs.")
     
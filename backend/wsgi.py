@@ -0,0 +1,15 @@
+# wsgi.py
+# Gunicorn entry point for gevent workers.
+# Patch the stdlib before anything else is imported so the socket, ssl and threading
+# modules used by httpx (Supabase) and the OpenAI client cooperate with the gevent hub.
+from gevent import monkey
+monkey.patch_all()
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+from app import create_app
+
+app = create_app()
@@ -1,9 +1,15 @@
 import unittest
 import threading
-import time
+import queue
+import base64
+import subprocess
+import textwrap
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from unittest.mock import MagicMock, patch
 import sys
 import os
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -15,14 +21,22 @@ with patch.dict(os.environ, {
     'ZAI_API_KEY': 'test-zai-key'
 }):
     from backend.app.services.chat_service import ChatService
+    from backend.app.services.llm_service import LLMService
+    from backend.app.services.emotion_analysis_service import EmotionAnalysisService
+    from backend.app.services.safety_service import SafetyNet
+    from backend.app.services.cache_service import CacheManager
+    from backend.app.web import main, insights
+    from backend.app.config import ZAI_TIMEOUT
+    from supabase import Client
 
 class TestConcurrency(unittest.TestCase):
     def setUp(self):
-        self.mock_supabase = MagicMock()
-        self.mock_llm = MagicMock()
-        self.mock_analysis = MagicMock()
-        self.mock_safety = MagicMock()
-        self.mock_cache = MagicMock()
+        # Specced mocks reject attributes the real services do not have
+        self.mock_supabase = MagicMock(spec=Client)
+        self.mock_llm = MagicMock(spec=LLMService)
+        self.mock_analysis = MagicMock(spec=EmotionAnalysisService)
+        self.mock_safety = MagicMock(spec=SafetyNet)
+        self.mock_cache = MagicMock(spec=CacheManager)
         
         self.chat_service = ChatService(
             self.mock_supabase,
@@ -37,47 +51,187 @@ class TestConcurrency(unittest.TestCase):
         self.chat_service.get_current_user_id = MagicMock(return_value="test_user")
 
     def test_single_timer_scheduling(self):
-        """Test that rapid calls only result in one active timer."""
+        """Test that rapid calls only result in one pending extraction and one scheduler thread."""
         
         # Simulate 10 rapid messages
         for i in range(10):
             self.chat_service._check_conversation_activity()
             
-        # Check that we have a timer
-        self.assertIsNotNone(self.chat_service._extraction_timer)
-        self.assertTrue(self.chat_service._extraction_timer.is_alive())
+        # Check that we have a single deadline and a running scheduler
+        self.assertEqual(list(self.chat_service._extraction_deadlines), ["test_user"])
+        self.assertIsNotNone(self.chat_service._extraction_scheduler)
+        self.assertTrue(self.chat_service._extraction_scheduler.is_alive())
         
-    @patch('threading.Timer')
-    def test_timer_cancellation(self, mock_timer_cls):
-        """Verify that previous timers are cancelled."""
-        mock_timer_instance = MagicMock()
-        mock_timer_cls.return_value = mock_timer_instance
+    @patch('backend.app.services.chat_service.time.monotonic')
+    def test_timer_cancellation(self, mock_monotonic):
+        """Verify that each message pushes the pending extraction back instead of adding another."""
+        delay = self.chat_service.MEMORY_EXTRACTION_DELAY
         
         # First call
+        mock_monotonic.return_value = 100.0
         self.chat_service._check_conversation_activity()
+        self.assertEqual(self.chat_service._extraction_deadlines["test_user"], 100.0 + delay)
         
-        # Second call
+        # Second call moves the same deadline forward
+        mock_monotonic.return_value = 160.0
         self.chat_service._check_conversation_activity()
+        self.assertEqual(self.chat_service._extraction_deadlines, {"test_user": 160.0 + delay})
+
+    def test_users_do_not_cancel_each_other(self):
+        """A message from one user must not reset another user's pending extraction."""
+        self.chat_service.get_current_user_id.return_value = "user_a"
+        self.chat_service._check_conversation_activity()
+        deadline_a = self.chat_service._extraction_deadlines["user_a"]
         
-        # Since we mock the class, every instantiation returns the SAME mock object by default unless side_effect is used.
-        # Let's use side_effect to return distinct mocks.
-        timer1 = MagicMock()
-        timer2 = MagicMock()
-        mock_timer_cls.side_effect = [timer1, timer2]
-        
-        # Reset and try again
-        self.chat_service._extraction_timer = None
+        self.chat_service.get_current_user_id.return_value = "user_b"
+        self.chat_service._check_conversation_activity()
         
-        # Call 1
+        self.assertEqual(self.chat_service._extraction_deadlines["user_a"], deadline_a)
+        self.assertIn("user_b", self.chat_service._extraction_deadlines)
+
+    def test_extraction_runs_after_quiet_period(self):
+        """The scheduler fires once the deadline passes and forgets the user."""
+        journal_written = threading.Event()
+        self.chat_service._generate_automated_journal.side_effect = lambda user_id: journal_written.set()
+        self.chat_service.MEMORY_EXTRACTION_DELAY = 0.05
         self.chat_service._check_conversation_activity()
-        self.assertEqual(self.chat_service._extraction_timer, timer1)
-        timer1.start.assert_called_once()
         
-        # Call 2
+        self.assertTrue(journal_written.wait(timeout=5), "Extraction did not run after the quiet period")
+        self.chat_service._summarize_and_save_memories.assert_called_once()
+        self.chat_service._generate_automated_journal.assert_called_once_with("test_user")
+        self.assertEqual(self.chat_service._extraction_deadlines, {})
+
+    def test_due_users_do_not_block_each_other_or_chat_io(self):
+        """A slow extraction must not hold up another due user or the chat-io pool used by /chat."""
+        release_a = threading.Event()
+        journal_b_written = threading.Event()
+        extraction_threads = set()
+
+        def generate_journal(user_id):
+            extraction_threads.add(threading.current_thread().name)
+            if user_id == "user_a":
+                release_a.wait(timeout=5)
+            else:
+                journal_b_written.set()
+
+        self.chat_service._generate_automated_journal.side_effect = generate_journal
+        self.chat_service.MEMORY_EXTRACTION_DELAY = 0.05
+        self.chat_service.get_current_user_id.return_value = "user_a"
+        self.chat_service._check_conversation_activity()
+        self.chat_service.get_current_user_id.return_value = "user_b"
         self.chat_service._check_conversation_activity()
-        timer1.cancel.assert_called_once() # Crucial check
-        self.assertEqual(self.chat_service._extraction_timer, timer2)
-        timer2.start.assert_called_once()
+
+        try:
+            self.assertTrue(journal_b_written.wait(timeout=5), "user_b waited on user_a's extraction")
+            self.assertEqual(self.chat_service._io_executor.submit(lambda: "prefs").result(timeout=1), "prefs")
+            self.assertIn("user_a", self.chat_service._extraction_in_flight)
+        finally:
+            release_a.set()
+        self.assertTrue(all(name.startswith("memory-extraction") for name in extraction_threads))
+
+class TestRecorderShutdown(unittest.TestCase):
+    def test_stop_flushes_queued_chat_turns(self):
+        """Turns /chat already answered for are stored when the worker stops, and the recorder exits."""
+        flushed = []
+        with patch.object(main, '_chat_turn_queue', queue.Queue()), \
+             patch.object(main, '_chat_turn_recorder', None), \
+             patch.object(main, '_chat_turn_stop', threading.Event()), \
+             patch.object(main, '_flush_chat_turns', side_effect=flushed.extend), \
+             patch.object(main.atexit, 'register'):
+            main.start_chat_turn_recorder()
+            recorder = main._chat_turn_recorder
+            for i in range(5):
+                main._chat_turn_queue.put({'p_user_content': f"turn {i}"})
+
+            main.stop_chat_turn_recorder(timeout=5)
+
+            self.assertFalse(recorder.is_alive())
+            self.assertTrue(main._chat_turn_queue.empty())
+        self.assertEqual([turn['p_user_content'] for turn in flushed], [f"turn {i}" for i in range(5)])
+
+    def test_stop_flushes_turns_when_recorder_never_started(self):
+        """Turns queued before the recorder started are still stored on shutdown."""
+        flushed = []
+        with patch.object(main, '_chat_turn_queue', queue.Queue()), \
+             patch.object(main, '_chat_turn_recorder', None), \
+             patch.object(main, '_chat_turn_stop', threading.Event()), \
+             patch.object(main, '_flush_chat_turns', side_effect=flushed.extend):
+            main._chat_turn_queue.put({'p_user_content': "early turn"})
+            main.stop_chat_turn_recorder(timeout=5)
+            self.assertTrue(main._chat_turn_stop.is_set())
+        self.assertEqual(flushed, [{'p_user_content': "early turn"}])
+
+    @patch('backend.app.services.chat_service.atexit.register')
+    def test_stop_flushes_queued_moods(self, _register):
+        """Moods POST /mood already returned ids for are stored when the worker stops."""
+        chat_service = ChatService(MagicMock(spec=Client), MagicMock(spec=LLMService),
+                                   MagicMock(spec=EmotionAnalysisService), MagicMock(spec=SafetyNet),
+                                   MagicMock(spec=CacheManager))
+        flushed = []
+        chat_service._flush_moods = MagicMock(side_effect=flushed.extend)
+        chat_service.start_mood_recorder()
+        entries = [chat_service.record_mood("test_user", 0.5, "calm") for _ in range(5)]
+
+        chat_service.stop_mood_recorder(timeout=5)
+
+        self.assertFalse(chat_service._mood_recorder.is_alive())
+        self.assertEqual([row['id'] for row in flushed], [entry['id'] for entry in entries])
+        # After shutdown a mood is stored inline rather than queued
+        late = chat_service.record_mood("test_user", 0.1, "tired")
+        self.assertEqual(flushed[-1], late)
+
+class TestRecapGeneration(unittest.TestCase):
+    def test_follower_outwaits_the_recap_llm_call(self):
+        """A second generate request waits longer than the first one's LLM call can take."""
+        self.assertGreater(insights._recap_generation.timeout, ZAI_TIMEOUT * 3)
+
+    def test_follower_timeout_returns_pending(self):
+        """A waiting request that gives up reports the recap as pending instead of failing."""
+        app = MagicMock(supabase=MagicMock(spec=Client))
+        with patch.object(insights, 'current_app', app), \
+             patch.object(insights, 'request', MagicMock(current_user={'id': "test_user"})), \
+             patch.object(insights, 'jsonify', side_effect=lambda payload: payload), \
+             patch.object(insights._recap_generation, 'do', side_effect=FuturesTimeoutError()):
+            payload, status = insights.generate_recap.__wrapped__()
+        self.assertEqual(status, 202)
+        self.assertEqual(payload["status"], "pending")
+
+class TestKeyDerivationPool(unittest.TestCase):
+    def test_generate_encryption_key_in_gevent_worker(self):
+        """Export key derivation works inside a monkey-patched worker that already runs background threads."""
+        # Mirrors wsgi.py under gunicorn's gevent worker: patch first, then the app and its recorder/pool threads
+        script = textwrap.dedent('''
+            from gevent import monkey
+            monkey.patch_all()
+            import time
+            from concurrent.futures import ThreadPoolExecutor
+            from app.web import main
+            from app.security import generate_encryption_key, _get_kdf_pool
+            main.start_chat_turn_recorder()
+            busy = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chat-io")
+            for _ in range(4):
+                busy.submit(time.sleep, 0.5)
+            print(generate_encryption_key("export password").decode())
+            # A forked child would inherit the patched threading module and the worker's hub
+            print(_get_kdf_pool().submit(monkey.is_module_patched, 'threading').result())
+        ''')
+        env = {
+            'SUPABASE_URL': 'https://example.supabase.co',
+            'SUPABASE_KEY': 'test-key',
+            'SUPABASE_SERVICE_KEY': 'test-service-key',
+            'ZAI_API_KEY': 'test-zai-key',
+            **os.environ
+        }
+        backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+        result = subprocess.run([sys.executable, '-c', script], cwd=backend_dir, env=env,
+                                capture_output=True, text=True, timeout=120)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        derived_key, child_patched = result.stdout.strip().splitlines()[-2:]
+        self.assertEqual(child_patched, "False")
+        # Keys must match the earlier in-process derivation, or existing exports stop decrypting
+        expected = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=b'warmth_export_salt', iterations=100000)
+        self.assertEqual(derived_key, base64.urlsafe_b64encode(expected.derive(b"export password")).decode())
 
 if __name__ == '__main__':
     unittest.main()
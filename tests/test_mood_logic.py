@@ -34,13 +34,17 @@ class TestMoodLogic(unittest.TestCase):
         )
         self.chat_service.set_user_context('test_user')
 
-    def test_mood_aggregation_skip(self):
-        # Mock last log < 3 hours ago
-        last_time = datetime.utcnow() - timedelta(hours=1)
-        self.mock_supabase.table().select().eq().order().limit().execute.return_value.data = [{
-            'score': 0.5,
+    def _seed_last_mood(self, score, minutes_ago):
+        """Makes the cached mood window's newest entry a log of score, minutes_ago minutes old."""
+        last_time = datetime.utcnow() - timedelta(minutes=minutes_ago)
+        self.chat_service.get_mood_logs = MagicMock(return_value=([{
+            'score': score,
             'timestamp': last_time.isoformat() + 'Z'
-        }]
+        }], False))
+
+    def test_mood_aggregation_skip(self):
+        # Mock last log inside the 1 hour aggregation window
+        self._seed_last_mood(0.5, minutes_ago=30)
         
         # Mock analysis result (same score)
         self.mock_analyzer.analyze_message.return_value = {
@@ -55,12 +59,8 @@ class TestMoodLogic(unittest.TestCase):
         self.mock_supabase.table().insert.assert_not_called()
 
     def test_mood_aggregation_force_log(self):
-        # Mock last log < 3 hours ago
-        last_time = datetime.utcnow() - timedelta(hours=1)
-        self.mock_supabase.table().select().eq().order().limit().execute.return_value.data = [{
-            'score': 0.5,
-            'timestamp': last_time.isoformat() + 'Z'
-        }]
+        # Mock last log inside the 1 hour aggregation window
+        self._seed_last_mood(0.5, minutes_ago=30)
         
         # Mock analysis result (significant change)
         self.mock_analyzer.analyze_message.return_value = {